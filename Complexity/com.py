@@ -1,71 +1,30 @@
+import imports
+import warehouse
+
+# column order of the tables below; GPT-4 is the GPT-4o of complexity.txt
+MODELS = ('GPT-4', 'GPT-3.5', 'Gemini')
+
 def main():
-  with open("complexity.txt", "r") as f:
-    data = f.readlines()
-  
-  tasks = [[[ [] for _ in range(4)] for _ in range(6)] for _ in range(9)]
-  t = -1
-  p = 0
-  m = 0
-  a = 0
-
-  # split data
-  for line in data:
-    l = line.strip()
-
-    # skip lines
-    if l == "task.py": continue
-
-    # increment tasks
-    elif l[0:3] == "# T": 
-      t += 1
-      p = 0
-      m = 0
-      a = 0
-
-    # increment persona
-    elif l == "## Persona 1": continue
-    elif l == "## Persona 2": 
-      p = 1
-      m = 0
-      a = 0
-
-    # increment model
-    elif l == "### GPT-4": continue 
-    elif l == "### GPT-3.5": 
-      m = 1
-      a = 0
-    elif l == "### Bard":
-      m = 2
-      a = 0
-    elif l == "### Gemini": 
-      m = 2
-      a = 0
-
-    # increment which test we did
-    elif l == "#### Cyclomatic Complexity test": continue
-    elif l == "#### Maintainability Index score (multi-line comments)": a = 1
-    elif l == "#### raw metrics": a = 2
-    elif l == "#### Halstead complexity metrics (file)": a = 3
-
-    # store lines
-    else: tasks[t][p*3+m][a].append(l)
-  
+  conn = warehouse.build(sources=['complexity.txt'])
+  na = warehouse.cells(conn, 'na')
+  blocks = warehouse.cells(conn, 'blocks')
+  average = warehouse.cells(conn, 'cc_average')
+  loc = warehouse.cells(conn, 'loc')
+  comments = warehouse.cells(conn, 'c_l')
+
   # analyze complexity first
   complex_results = [[] for _ in range(9)]
 
-
   for i in range(9):
     for j in range(2):
-      for k in range(3):
-        # print(f"Task {i+1}, Persona {j+1}, Model {k+1}:")
-        for line in tasks[i][j*3+k][0]:
-          print(line)
-          if "blocks (classes, functions, methods) analyzed." in line: complex_results[i].append(int(line[0]))
-          elif "Average complexity:" in line: complex_results[i].append(line.split(': ')[-1])
-          if line.strip() == "NA": 
-            complex_results[i].append(0)
-            complex_results[i].append(0)
-        # print()
+      for k, model in enumerate(MODELS):
+        cell = (i+1, j+1, model)
+        if cell in na:
+          complex_results[i].append(0)
+          complex_results[i].append(0)
+        else:
+          complex_results[i].append(int(blocks[cell]))
+          complex_results[i].append(average[cell])
   
   print("Tasks")
   for line in complex_results: 
@@ -100,15 +59,15 @@ def main():
       
       # Per model
       b[(j//2)%3] += complex_results[i][j]
-      s[(j//2)%3] += float(complex_results[i][j+1].split('(')[1].split(')')[0])
+      s[(j//2)%3] += complex_results[i][j+1]
       task.append(complex_results[i][j])
-      task.append(float(complex_results[i][j+1].split('(')[1].split(')')[0]))
+      task.append(complex_results[i][j+1])
 
       # Per persona
       persona_b[j//6] += complex_results[i][j]
-      persona_s[j//6] += float(complex_results[i][j+1].split('(')[1].split(')')[0])
+      persona_s[j//6] += complex_results[i][j+1]
       pb[j//6] += complex_results[i][j]
-      ps[j//6] += float(complex_results[i][j+1].split('(')[1].split(')')[0])
+      ps[j//6] += complex_results[i][j+1]
     print(f"Task {i+1} ", end="")
     for k in (2,0,4):
       print(f"& {(task[k]+task[k+6])/2}; \color{{blue}}{round((task[k+1]+task[k+1+6])/2,2)} ", end="")
@@ -122,27 +81,19 @@ def main():
 
   for i in range(9):
     for j in range(2):
-      for k in range(3):
-        # print(f"Task {i+1}, Persona {j+1}, Model {k+1}:")
+      for k, model in enumerate(MODELS):
+        cell = (i+1, j+1, model)
 
         # Fill in NA 
-        if tasks[i][j*3+k] == [['NA'], [], [], []]:
+        if cell in na:
           print(f"Task {i+1}, Persona {j+1}, Model {k+1} is NA")
           if j == 1:
             raw[i].append(raw[i][k*2])
             raw[i].append(raw[i][k*2+1])
           continue
 
-        f = 0
-        for line in tasks[i][j*3+k][2]:
-          if line == "** Total **": f=1
-          elif not f: continue
-          # print(line)
-          if "LOC:" in line and "SLOC" not in line and "LLOC" not in line: raw[i].append(int(line.split(': ')[1]))
-          elif "(C % L):" in line: 
-            raw[i].append(int(line.split(': ')[1].split('%')[0]))
-            f = 0
-        # print()
+        raw[i].append(int(loc[cell]))
+        raw[i].append(int(comments[cell]))
 
   for l in raw:
     print(l)
@@ -180,19 +131,9 @@ def main():
   print("\nExternal library calls")
 
   ## Order is [GPT-4o P1, GPT3.5 P1, Gemini P1, GPT-4o P2, GPT-3.5 P2, Gemini P2]
-  # -1 is no output (Gemini)
-  # rows are tasks, columns are models/personas
-  ext_libs = [
-    [6, 3, 0, 3, 2, 3],
-    [2, 1, 2, 1, 2, 3],
-    [3, 1, 3, 2, 1, 1],
-    [1, 1, 1, 1, 1, 0],
-    [2, 1, 2, 5, 1, 4],
-    [2, 1, 0, 4, 3, 1],
-    [3, 1, 1, 1, 1, 3],
-    [0, 1, 2, 0, 1, 6],
-    [1, 1, 1, 4, 1, 1],
-  ]
+  # -1 is no output, rows are tasks, columns are models/personas; counted by
+  # imports.py from the outputs (the GPT-4o ones are in chat_gpt/gpt4)
+  ext_libs = imports.ext_libs(MODELS)
 
   persona_totals = [[],[]]
   model_totals = [[[],[]],[[],[]],[[],[]]]
@@ -0,0 +1,224 @@
+import ast
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+# SQLite manifest of the model outputs. The folder layout differs per model
+# ("Task 1/security_task1run2.py", "Task1/test1/test1a.py",
+# "task1/test3/test3ascript.py", ...), so paths are interpreted once here and
+# stored with normalized keys; analysis scripts query the manifest instead of
+# walking the tree and guessing from file names again.
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus.db')
+
+# (folder prefix, model, variant, label used in the paper figures)
+MODELS = [
+  ('chat_gpt/gpt3_5/', 'gpt3_5', '', "GPT-3.5"),
+  ('chat_gpt/gpt4/', 'gpt4', '', "GPT-4"),
+  ('chat_gpt/gpto3/o3_high/', 'o3', 'high', "GPT-o3-mini-high"),
+  ('chat_gpt/gpto3/o3_regular/', 'o3', 'regular', "GPT-o3-mini"),
+  ('Gemini/Gemini/', 'gemini', '', "Gemini"),
+  ('Gemini/GeminiReasoning/', 'gemini', 'reasoning', "Gemini Flash 2.0 Thinking"),
+  ('deepseek/', 'deepseek', '', "Deepseek"),
+]
+
+TASK = re.compile(r"task ?(\d+)$", re.I)
+RUN_DIR = re.compile(r"test(\d+)[ab]?$")
+RUN_FILE = re.compile(r"(?:run|task\d+test)(\d+)")
+SIDE = re.compile(r"test\d+([ab])$")
+# file names of the generated applications; everything else (unit tests,
+# request scripts, templates copies, prompt comparisons) is a helper
+APP = re.compile(r"(test\d+[ab]?|task\d+|security_task\d+run\d+|task\d+test\d*)$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+  path TEXT PRIMARY KEY,
+  model TEXT NOT NULL,
+  variant TEXT NOT NULL,
+  label TEXT NOT NULL,
+  persona TEXT NOT NULL,
+  reliability INTEGER NOT NULL,
+  task INTEGER,
+  run INTEGER,
+  side TEXT,
+  role TEXT NOT NULL,
+  mtime REAL NOT NULL,
+  size INTEGER NOT NULL,
+  sha256 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_key ON files (model, variant, persona, reliability, task, run);
+CREATE INDEX IF NOT EXISTS files_task ON files (task, persona, reliability);
+CREATE INDEX IF NOT EXISTS files_hash ON files (sha256);
+CREATE TABLE IF NOT EXISTS dirs (
+  path TEXT PRIMARY KEY,
+  mtime REAL NOT NULL
+);
+"""
+
+COLUMNS = ('path', 'model', 'variant', 'label', 'persona', 'reliability', 'task', 'run',
+           'side', 'role', 'mtime', 'size', 'sha256')
+
+
+def classify(path):
+  # normalized keys for a path relative to ROOT, None if it is not a model output
+  path = path.replace(os.sep, '/')
+  for prefix, model, variant, label in MODELS:
+    if path.startswith(prefix): break
+  else:
+    return None
+
+  parts = path[len(prefix):].split('/')
+  if len(parts) < 3: return None
+  group, dirs, stem = parts[0].lower(), parts[1:-1], os.path.splitext(parts[-1])[0]
+
+  task = next((int(m.group(1)) for m in map(TASK.match, dirs) if m), None)
+  run = next((int(m.group(1)) for m in map(RUN_DIR.match, dirs) if m), None)
+  if run is None:
+    m = RUN_FILE.search(stem)
+    run = int(m.group(1)) if m else 1
+
+  reliability = 'reliability' in group
+  side = SIDE.match(stem) if reliability else None
+  role = 'app' if APP.match(stem) and 'templates' not in dirs else 'helper'
+
+  return {
+    'path': path, 'model': model, 'variant': variant, 'label': label,
+    'persona': 'security' if 'security' in group else 'software',
+    'reliability': int(reliability), 'task': task, 'run': run,
+    'side': side.group(1) if side else None, 'role': role,
+  }
+
+
+def connect(db=MANIFEST):
+  conn = sqlite3.connect(db)
+  conn.row_factory = sqlite3.Row
+  conn.executescript(SCHEMA)
+  return conn
+
+
+def build(db=MANIFEST, root=ROOT):
+  # one walk over the tree; files whose mtime and size did not change keep
+  # their stored hash, removed files are dropped
+  conn = connect(db)
+  known = {r['path']: r for r in conn.execute("SELECT path, mtime, size, sha256 FROM files")}
+  rows = []
+  # folder mtimes change when files are added or removed, see stale()
+  dirs = []
+  for prefix, *_ in MODELS:
+    for dirpath, dirnames, filenames in os.walk(os.path.join(root, prefix)):
+      dirnames.sort()
+      dirs.append((os.path.relpath(dirpath, root).replace(os.sep, '/'), os.stat(dirpath).st_mtime))
+      for name in sorted(filenames):
+        if not name.endswith('.py'): continue
+        full = os.path.join(dirpath, name)
+        keys = classify(os.path.relpath(full, root))
+        if keys is None: continue
+        st = os.stat(full)
+        old = known.pop(keys['path'], None)
+        if old and old['mtime'] == st.st_mtime and old['size'] == st.st_size:
+          digest = old['sha256']
+        else:
+          with open(full, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        keys.update(mtime=st.st_mtime, size=st.st_size, sha256=digest)
+        rows.append(tuple(keys[c] for c in COLUMNS))
+
+  with conn:
+    conn.executemany(f"INSERT OR REPLACE INTO files VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+    conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in known])
+    conn.execute("DELETE FROM dirs")
+    conn.executemany("INSERT INTO dirs VALUES (?, ?)", dirs)
+  return conn
+
+
+def stale(conn, root=ROOT):
+  # a file in the manifest was edited or removed, or a folder gained or lost
+  # entries since the last build; stats every file and folder, no walk or hashing
+  folders = conn.execute("SELECT path, mtime FROM dirs").fetchall()
+  if not folders: return True
+  try:
+    if any(os.stat(os.path.join(root, r['path'])).st_mtime != r['mtime'] for r in folders): return True
+    for r in conn.execute("SELECT path, mtime, size FROM files"):
+      st = os.stat(os.path.join(root, r['path']))
+      if st.st_mtime != r['mtime'] or st.st_size != r['size']: return True
+  except OSError:
+    return True
+  return False
+
+
+def load(db=MANIFEST, root=ROOT):
+  # the existing manifest, rebuilt only when it is missing or stale
+  if os.path.exists(db):
+    conn = connect(db)
+    if not stale(conn, root): return conn
+    conn.close()
+  return build(db, root)
+
+
+def files(conn, **where):
+  # rows matching the given column values, e.g. files(conn, task=2, role='app')
+  unknown = set(where) - set(COLUMNS)
+  if unknown: raise ValueError(f"unknown manifest columns: {', '.join(sorted(unknown))}")
+  clause = " AND ".join(f"{k} IS ?" for k in where)
+  sql = "SELECT * FROM files" + (f" WHERE {clause}" if where else "") + " ORDER BY path"
+  return conn.execute(sql, tuple(where.values())).fetchall()
+
+
+def paths(conn=None, root=ROOT, **where):
+  # absolute paths of the matching files; a manifest opened here is closed again
+  if conn is not None:
+    return [os.path.join(root, r['path']) for r in files(conn, **where)]
+  conn = load()
+  try:
+    return paths(conn, root, **where)
+  finally:
+    conn.close()
+
+
+def dotted(node):
+  # "a.b.c" for a chain of attributes on a name, None otherwise
+  parts = []
+  while isinstance(node, ast.Attribute):
+    parts.append(node.attr)
+    node = node.value
+  if not isinstance(node, ast.Name): return None
+  return '.'.join([node.id] + parts[::-1])
+
+
+def load_cache(path, version):
+  # {key: result} of a JSON cache keyed "<version>:...", {} when the file is
+  # missing or unreadable; results of other versions are dropped
+  try:
+    with open(path) as f:
+      cache = json.load(f)
+  except (OSError, ValueError):
+    return {}
+  if not isinstance(cache, dict): return {}
+  return {k: v for k, v in cache.items() if k.startswith(f"{version}:")}
+
+
+def save_cache(cache, path):
+  # through a temporary file, so an interrupted run cannot truncate the cache
+  tmp = path + '.tmp'
+  with open(tmp, 'w') as f:
+    json.dump(cache, f)
+  os.replace(tmp, path)
+
+
+def main():
+  start = time.perf_counter()
+  conn = build(sys.argv[1] if len(sys.argv) > 1 else MANIFEST)
+  print(f"{conn.execute('SELECT COUNT(*) FROM files').fetchone()[0]} files indexed in {time.perf_counter() - start:.2f}s")
+  for r in conn.execute("""SELECT label, persona, reliability, role, COUNT(*) n FROM files
+                           GROUP BY model, variant, persona, reliability, role ORDER BY label"""):
+    kind = 'reliability' if r['reliability'] else 'persona'
+    print(f"  {r['label']:<28} {r['persona']:<9} {kind:<12} {r['role']:<7} {r['n']}")
+
+
+if __name__ == '__main__':
+  main()
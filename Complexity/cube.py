@@ -0,0 +1,73 @@
+import warnings
+
+import numpy as np
+
+# Metrics held in one labelled ndarray with the axes below. Cells without an
+# output (NA in complexity.txt, missing runs) are NaN, so every reduction is a
+# nan-aware numpy call over named axes instead of index arithmetic.
+
+AXES = ('task', 'persona', 'model', 'run', 'metric')
+
+
+class Cube:
+
+  def __init__(self, data, labels):
+    self.data = data
+    # axis name -> list of labels, in the same order as the data dimensions
+    self.labels = labels
+
+  @classmethod
+  def from_table(cls, table, metrics, models=None):
+    # build from a results.Table; complexity.txt has a single run per cell
+    tasks = np.unique(table.task)
+    personas = np.unique(table.persona)
+    models = list(models) if models is not None else list(table.models)
+
+    model_pos = np.array([models.index(m) if m in models else -1 for m in table.models], dtype=int)
+    metric_pos = np.array([metrics.index(m) if m in metrics else -1 for m in table.metrics], dtype=int)
+    m = model_pos[table.model]
+    k = metric_pos[table.metric]
+    keep = (m >= 0) & (k >= 0)
+
+    data = np.full((len(tasks), len(personas), len(models), 1, len(metrics)), np.nan)
+    data[np.searchsorted(tasks, table.task[keep]),
+         np.searchsorted(personas, table.persona[keep]),
+         m[keep], 0, k[keep]] = table.value[keep]
+
+    labels = {
+      'task': tasks.tolist(), 'persona': personas.tolist(), 'model': models,
+      'run': [1], 'metric': list(metrics),
+    }
+    return cls(data, labels)
+
+  @property
+  def axes(self):
+    return tuple(self.labels)
+
+  def axis(self, name):
+    return self.axes.index(name)
+
+  def sel(self, **selection):
+    # keep only the given labels along each named axis, in the order given
+    data = self.data
+    labels = dict(self.labels)
+    for name, wanted in selection.items():
+      if isinstance(wanted, (str, int)): wanted = [wanted]
+      index = [labels[name].index(w) for w in wanted]
+      data = np.take(data, index, axis=self.axis(name))
+      labels[name] = list(wanted)
+    return Cube(data, labels)
+
+  def mean(self, *names):
+    # nan-aware mean that drops the named axes
+    axes = tuple(self.axis(n) for n in names)
+    with warnings.catch_warnings():
+      # all-NaN slices (no output at all) stay NaN
+      warnings.simplefilter('ignore', RuntimeWarning)
+      data = np.nanmean(self.data, axis=axes)
+    labels = {k: v for k, v in self.labels.items() if k not in names}
+    return Cube(data, labels)
+
+  def __getitem__(self, metric):
+    # plain ndarray for one metric, metric axis dropped
+    return np.take(self.data, self.labels['metric'].index(metric), axis=self.axis('metric'))
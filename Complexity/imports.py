@@ -0,0 +1,208 @@
+import ast
+import hashlib
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import corpus
+
+# Import and call census of the model outputs. Every imported module is
+# classified as standard library, local (a module next to the file, e.g.
+# models.py) or third party (flask_sqlalchemy, bcrypt, cryptography, jwt,
+# stripe, ...), and call sites are attributed to the module the called name
+# was imported from (`bcrypt.hashpw(...)`, `Fernet(key)`, `SQLAlchemy(app)`).
+# Third-party packages an output only uses through its own local modules
+# (db = SQLAlchemy() in models.py) count for it too, following local imports
+# transitively.
+# Results are cached by the SHA-256 the corpus manifest already holds, so a
+# rerun only parses new or changed files.
+#
+#   python imports.py            external libraries per task, model and persona
+#   python imports.py <file>     census of one file
+
+CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imports_cache.json')
+
+# bump whenever the census changes so cached results are recomputed
+VERSION = 2
+
+STDLIB = set(sys.stdlib_module_names)
+
+
+def classify(module, local):
+  top = module.split('.')[0]
+  if top in STDLIB: return 'stdlib'
+  if top in local or module.startswith('.'): return 'local'
+  return 'third_party'
+
+
+def census(source, local=()):
+  tree = ast.parse(source)
+  # local name -> dotted origin, e.g. 'Fernet' -> 'cryptography.fernet.Fernet'
+  names = {}
+  modules = set()
+  # local modules imported, relative ones with their dots ('.models')
+  linked = set()
+  for node in ast.walk(tree):
+    if isinstance(node, ast.Import):
+      for a in node.names:
+        modules.add(a.name)
+        names[a.asname or a.name.split('.')[0]] = a.name if a.asname else a.name.split('.')[0]
+        if classify(a.name, local) == 'local': linked.add(a.name)
+    elif isinstance(node, ast.ImportFrom):
+      module = '.' * node.level + (node.module or '')
+      modules.add(module)
+      for a in node.names:
+        if a.name != '*': names[a.asname or a.name] = f"{module}.{a.name}"
+      if classify(module, local) == 'local':
+        # from . import models imports the module models
+        linked.update([module] if node.module else [module + a.name for a in node.names])
+
+  calls = Counter()
+  for node in ast.walk(tree):
+    if not isinstance(node, ast.Call): continue
+    func, attrs = node.func, []
+    while isinstance(func, ast.Attribute):
+      attrs.append(func.attr)
+      func = func.value
+    if isinstance(func, ast.Name) and func.id in names:
+      calls['.'.join([names[func.id]] + attrs[::-1])] += 1
+
+  kinds = defaultdict(set)
+  for module in modules:
+    kinds[classify(module, local)].add(module.split('.')[0] if not module.startswith('.') else module)
+  per_module = Counter()
+  for name, n in calls.items():
+    per_module[name.split('.')[0] if not name.startswith('.') else name] += n
+  return {
+    'imports': sorted(modules),
+    'stdlib': sorted(kinds['stdlib']), 'third_party': sorted(kinds['third_party']), 'local': sorted(kinds['local']),
+    'linked': sorted(linked),
+    'calls': dict(sorted(calls.items())),
+    # call sites per top-level module
+    'module_calls': dict(sorted(per_module.items())),
+  }
+
+
+def local_modules(path):
+  # modules a file can import from its own folder
+  folder = os.path.dirname(path)
+  return {os.path.splitext(n)[0] for n in os.listdir(folder) if n.endswith('.py')} | \
+         {n for n in os.listdir(folder) if os.path.isfile(os.path.join(folder, n, '__init__.py'))}
+
+
+def resolve(folder, module):
+  # file of a local module imported from folder, None if there is none
+  level = len(module) - len(module.lstrip('.'))
+  base = folder
+  for _ in range(level - 1): base = os.path.dirname(base)
+  parts = module.lstrip('.').split('.')
+  for candidate in (os.path.join(base, *parts) + '.py', os.path.join(base, *parts, '__init__.py')):
+    if os.path.isfile(candidate): return candidate
+  return None
+
+
+def cache_key(path, sha256):
+  # files in the same folder can import each other, so the folder listing is
+  # part of the key
+  return f"{VERSION}:{sha256}:{','.join(sorted(local_modules(path)))}"
+
+
+def reached(path, result, cache):
+  # third-party modules of a file and of the local modules it imports,
+  # transitively; local modules outside the manifest are parsed and cached too
+  seen, todo, found = {path}, [(path, result)], set()
+  while todo:
+    path, result = todo.pop()
+    found.update(result.get('third_party', []))
+    for module in result.get('linked', []):
+      target = resolve(os.path.dirname(path), module)
+      if target is None or target in seen: continue
+      seen.add(target)
+      with open(target, 'rb') as f:
+        key = cache_key(target, hashlib.sha256(f.read()).hexdigest())
+      if key not in cache: cache[key] = analyze_file(target)
+      todo.append((target, cache[key]))
+  return sorted(found)
+
+
+def analyze_file(path):
+  try:
+    with open(path, encoding='utf-8') as f:
+      return census(f.read(), local_modules(path))
+  except (SyntaxError, ValueError, UnicodeDecodeError) as e:
+    return {'error': f"{type(e).__name__}: {e}"}
+
+
+def analyze_corpus(conn=None, workers=None, **where):
+  # {path: census} for the manifest rows matching where; only files whose hash
+  # is not cached yet are parsed, spread over a process pool
+  conn = conn or corpus.load()
+  cache = corpus.load_cache(CACHE, VERSION)
+  rows = corpus.files(conn, **where)
+  keys, missing = [], {}
+  for r in rows:
+    path = os.path.join(corpus.ROOT, r['path'])
+    key = cache_key(path, r['sha256'])
+    keys.append(key)
+    if key not in cache: missing[key] = path
+
+  if missing:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+      cache.update(zip(missing, pool.map(analyze_file, missing.values(), chunksize=16)))
+  cached = len(cache)
+  out = {}
+  for r, key in zip(rows, keys):
+    # 'reached': third_party plus what the file's local modules import
+    out[r['path']] = dict(cache[key], reached=reached(os.path.join(corpus.ROOT, r['path']), cache[key], cache))
+  if missing or len(cache) > cached: corpus.save_cache(cache, CACHE)
+  return out
+
+
+def ext_libs(models, conn=None, personas=('software', 'security'), tasks=range(1, 10)):
+  # distinct third-party libraries per task (rows) and persona/model (columns,
+  # [model P1 ..., model P2 ...]) in the first run of each output, as the
+  # hand-counted table did; -1 where a model has no output
+  conn = conn or corpus.load()
+  results = analyze_corpus(conn, role='app', reliability=0)
+  counts = {}
+  for r in sorted(corpus.files(conn, role='app', reliability=0), key=lambda r: -r['run']):
+    result = results[r['path']]
+    if 'error' not in result:
+      counts[(r['task'], r['persona'], r['label'])] = len(result['reached'])
+  return [[counts.get((task, persona, model), -1) for persona in personas for model in models] for task in tasks]
+
+
+def main():
+  if len(sys.argv) > 1:
+    for path in sys.argv[1:]:
+      result = analyze_file(os.path.abspath(path))
+      if 'error' not in result: result['reached'] = reached(os.path.abspath(path), result, {})
+      print(f"{path}:")
+      for key, value in result.items():
+        print(f"  {key}: {value}")
+    return
+
+  start = time.perf_counter()
+  conn = corpus.load()
+  results = analyze_corpus(conn)
+  print(f"{len(results)} files in {time.perf_counter() - start:.2f}s\n")
+
+  models = [label for *_, label in corpus.MODELS]
+  table = ext_libs(models, conn)
+  print("Third-party libraries in the first run, P1 (software); P2 (security)")
+  print(f"{'':<8}" + "".join(f"{m[:18]:>20}" for m in models))
+  for task, row in enumerate(table, 1):
+    cells = [f"{row[i]}; {row[i + len(models)]}" for i in range(len(models))]
+    print(f"Task {task:<3}" + "".join(f"{c:>20}" for c in cells))
+
+  third = Counter(m for r in results.values() for m in r.get('third_party', []))
+  print("\nMost imported third-party modules")
+  for module, n in third.most_common(15):
+    calls = sum(r.get('module_calls', {}).get(module, 0) for r in results.values())
+    print(f"  {module:<22} {n:>4} files {calls:>6} call sites")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,413 @@
+import ast
+import hashlib
+import io
+import json
+import math
+import os
+import sys
+import time
+import tokenize
+from concurrent.futures import ProcessPoolExecutor
+
+import corpus
+
+# In-process replacement for radon.sh. Every file is read and parsed once and
+# a single AST walk collects cyclomatic complexity and Halstead counts; raw
+# LOC/comment stats come from one tokenize pass. The definitions follow radon
+# so the numbers line up with the existing complexity.txt.
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics_cache.json')
+
+# bump whenever a metric definition changes so cached results are recomputed
+VERSION = 3
+
+
+def corpus_files():
+  return corpus.paths()
+
+
+class Visitor(ast.NodeVisitor):
+  # Cyclomatic complexity and Halstead operators/operands in one traversal.
+
+  def __init__(self):
+    # cyclomatic complexity
+    # [kind, complexity, methods, listed]; nested classes and whatever is in
+    # them are not listed as blocks, like radon's inner classes
+    self.scopes = [['module', 1, 0, True]]
+    self.inner = 0
+    self.blocks = []
+    self.classname = None
+    self.asserts = 0
+
+    # halstead
+    self.context = []
+    self.functions = []
+    self.halstead = [0, 0, set(), set()]
+
+  # cyclomatic complexity
+  @property
+  def total(self):
+    # module level decisions plus everything inside functions and classes
+    return self.scopes[0][1] + self.inner
+
+  def decision(self, n):
+    # radon does not look inside assert statements
+    if not self.asserts: self.scopes[-1][1] += n
+
+  def visit_If(self, node):
+    self.decision(1)
+    self.generic_visit(node)
+
+  visit_IfExp = visit_If
+
+  def visit_For(self, node):
+    self.decision(1 + bool(node.orelse))
+    self.generic_visit(node)
+
+  visit_AsyncFor = visit_For
+  visit_While = visit_For
+
+  def visit_Try(self, node):
+    self.decision(len(node.handlers) + bool(node.orelse))
+    self.generic_visit(node)
+
+  visit_TryStar = visit_Try
+
+  def visit_Match(self, node):
+    underscore = any(getattr(c.pattern, 'pattern', False) is None for c in node.cases)
+    self.decision(max(0, len(node.cases) - underscore))
+    self.generic_visit(node)
+
+  def visit_comprehension(self, node):
+    self.decision(len(node.ifs) + 1)
+    self.generic_visit(node)
+
+  def visit_Assert(self, node):
+    self.decision(1)
+    # the operators and operands still count for Halstead
+    self.asserts += 1
+    self.generic_visit(node)
+    self.asserts -= 1
+
+  def visit_FunctionDef(self, node):
+    parent = self.scopes[-1]
+    self.scopes.append(['function', 1, 0, False])
+    # [name, [N1, N2, operators, operands]]
+    self.context.append([node.name, [0, 0, set(), set()]])
+    for child in node.body:
+      self.visit(child)
+    _, cc, _, _ = self.scopes.pop()
+    fn = self.context.pop()
+
+    # closures are not reported on their own, like radon cc without --show-closures
+    if parent[0] != 'function' and parent[3]:
+      kind = 'M' if parent[0] == 'class' else 'F'
+      name = f"{self.classname}.{node.name}" if kind == 'M' else node.name
+      self.blocks.append({'type': kind, 'name': name, 'lineno': node.lineno, 'col': node.col_offset, 'complexity': cc})
+    if parent[0] == 'class':
+      parent[1] += cc
+      parent[2] += 1
+    elif parent[0] == 'module':
+      self.inner += cc - 1
+
+    # nested functions are folded into the enclosing one
+    if self.context:
+      outer = self.context[-1][1]
+      outer[0] += fn[1][0]
+      outer[1] += fn[1][1]
+      outer[2] |= fn[1][2]
+      outer[3] |= fn[1][3]
+    else:
+      self.functions.append(fn)
+
+  visit_AsyncFunctionDef = visit_FunctionDef
+
+  def visit_ClassDef(self, node):
+    parent = self.scopes[-1]
+    outer = self.classname
+    self.classname = node.name
+    self.scopes.append(['class', 1, 0, parent[0] == 'module'])
+    for child in node.body:
+      self.visit(child)
+    _, cc, methods, _ = self.scopes.pop()
+    self.classname = outer
+
+    # a class inside a class or function adds nothing to its parent
+    if parent[0] == 'module':
+      average = cc if not methods else int(cc / methods) + (methods > 1)
+      self.blocks.append({'type': 'C', 'name': node.name, 'lineno': node.lineno, 'col': node.col_offset, 'complexity': average})
+      self.inner += cc - 1
+
+  # halstead
+  def operand(self, node):
+    for attr in ('id', 'attr', 'value'):
+      if hasattr(node, attr) and not isinstance(getattr(node, attr), ast.AST):
+        return getattr(node, attr)
+    return id(node)
+
+  def count(self, op_names, operands):
+    context = self.context[-1][0] if self.context else None
+    keys = [(context, self.operand(o)) for o in operands]
+    targets = [self.halstead] + ([self.context[-1][1]] if self.context else [])
+    for t in targets:
+      t[0] += len(op_names)
+      t[1] += len(keys)
+      t[2].update(op_names)
+      t[3].update(keys)
+
+  def visit_BinOp(self, node):
+    self.count([type(node.op).__name__], [node.left, node.right])
+    self.generic_visit(node)
+
+  def visit_UnaryOp(self, node):
+    self.count([type(node.op).__name__], [node.operand])
+    self.generic_visit(node)
+
+  def visit_BoolOp(self, node):
+    self.decision(len(node.values) - 1)
+    self.count([type(node.op).__name__], node.values)
+    self.generic_visit(node)
+
+  def visit_AugAssign(self, node):
+    self.count([type(node.op).__name__], [node.target, node.value])
+    self.generic_visit(node)
+
+  def visit_Compare(self, node):
+    self.count([type(o).__name__ for o in node.ops], node.comparators + [node.left])
+    self.generic_visit(node)
+
+
+def halstead_report(h1, h2, N1, N2):
+  h = h1 + h2
+  N = N1 + N2
+  length = h1 * math.log(h1, 2) + h2 * math.log(h2, 2) if h1 and h2 else 0
+  volume = N * math.log(h, 2) if h else 0
+  difficulty = (h1 * N2) / float(2 * h2) if h2 else 0
+  effort = difficulty * volume
+  return {
+    'h1': h1, 'h2': h2, 'N1': N1, 'N2': N2,
+    'vocabulary': h, 'length': N,
+    'calculated_length': length, 'volume': volume,
+    'difficulty': difficulty, 'effort': effort,
+    'time': effort / 18.0, 'bugs': volume / 3000.0,
+  }
+
+
+def logical_lines(tokens):
+  # radon counts "if x: y" as two logical lines, "if x:" as one
+  n = 0
+  parts = [[]]
+  for tok in tokens:
+    if tok.type == tokenize.OP and tok.string == ';': parts.append([])
+    else: parts[-1].append(tok)
+  for part in parts:
+    if not part: continue
+    colons = [i for i, t in enumerate(part) if t.type == tokenize.OP and t.string == ':']
+    n += 2 - (colons[-1] == len(part) - 1) if colons else 1
+  return n
+
+
+def raw_metrics(source):
+  lines = source.splitlines()
+  sloc = lloc = comments = single = multi = blank = 0
+
+  def span(start, end):
+    text = lines[start - 1:end]
+    filled = sum(1 for l in text if l.strip())
+    return filled, len(text) - filled
+
+  skip = (tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT,
+          tokenize.ENCODING, tokenize.ENDMARKER)
+  current = []
+  for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+    if tok.type == tokenize.COMMENT:
+      comments += 1
+    if tok.type not in skip:
+      current.append(tok)
+      continue
+    if tok.type == tokenize.NL and current and all(t.type == tokenize.COMMENT for t in current):
+      single += 1
+      current = []
+    elif tok.type in (tokenize.NEWLINE, tokenize.ENDMARKER) and current:
+      code = [t for t in current if t.type != tokenize.COMMENT]
+      start, end = current[0].start[0], tok.start[0]
+      lloc += logical_lines(code)
+      if len(code) == 1 and code[0].type == tokenize.STRING:
+        if code[0].start[0] == code[0].end[0]: single += 1
+        else:
+          filled, empty = span(code[0].start[0], code[0].end[0])
+          multi += filled
+          blank += empty
+      elif code:
+        filled, empty = span(start, end)
+        sloc += filled
+        blank += empty
+      current = []
+
+  loc = len(lines)
+  blank = loc - sloc - multi - single
+  return {'loc': loc, 'lloc': lloc, 'sloc': sloc, 'comments': comments,
+          'multi': multi, 'blank': blank, 'single_comments': single}
+
+
+def maintainability(volume, complexity, sloc, comments):
+  if volume <= 0 or sloc <= 0:
+    return 100.0
+  mi = (171 - 5.2 * math.log(volume) - 0.23 * complexity - 16.2 * math.log(sloc)
+        + 50 * math.sin(math.sqrt(2.46 * math.radians(comments))))
+  return min(max(0.0, mi * 100 / 171.0), 100.0)
+
+
+def analyze_source(source):
+  tree = ast.parse(source)
+  visitor = Visitor()
+  visitor.visit(tree)
+  raw = raw_metrics(source)
+
+  h = visitor.halstead
+  total = halstead_report(len(h[2]), len(h[3]), h[0], h[1])
+  functions = {name: halstead_report(len(h[2]), len(h[3]), h[0], h[1]) for name, h in visitor.functions}
+
+  blocks = sorted(visitor.blocks, key=lambda b: (-b['complexity'], b['lineno']))
+  average = sum(b['complexity'] for b in blocks) / len(blocks) if blocks else 0.0
+
+  mi = {}
+  for key, multi in (('mi', True), ('mi_no_multi', False)):
+    c = raw['comments'] + (raw['multi'] if multi else 0)
+    percent = c / float(raw['sloc']) * 100 if raw['sloc'] else 0
+    mi[key] = maintainability(total['volume'], visitor.total, raw['lloc'], percent)
+
+  return {
+    'cc': {'blocks': blocks, 'average': average, 'total': visitor.total},
+    'mi': mi['mi'],
+    'mi_no_multi': mi['mi_no_multi'],
+    'raw': raw,
+    'halstead': {'total': total, 'functions': functions},
+  }
+
+
+def analyze_bytes(data):
+  try:
+    return analyze_source(data.decode('utf-8'))
+  except (SyntaxError, ValueError, UnicodeDecodeError, tokenize.TokenError) as e:
+    return {'error': f"{type(e).__name__}: {e}"}
+
+
+def analyze_file(path):
+  with open(path, 'rb') as f:
+    result = analyze_bytes(f.read())
+  result['path'] = os.path.relpath(path, ROOT)
+  return result
+
+
+# results are cached by the SHA-256 of the file contents plus VERSION, so a
+# rerun only parses files that were added or edited since the last one
+def cache_key(data):
+  return f"{VERSION}:{hashlib.sha256(data).hexdigest()}"
+
+
+def load_cache(path=CACHE):
+  # results computed by an older version of the engine are dropped
+  return corpus.load_cache(path, VERSION)
+
+
+def save_cache(cache, path=CACHE):
+  corpus.save_cache(cache, path)
+
+
+def analyze_corpus(paths, workers=None, cache=None, prune=False):
+  # prune=True when paths is the whole corpus: entries of files that were
+  # edited or removed since are dropped from cache, so it does not only grow
+  if cache is None: cache = {}
+  keys = []
+  missing = {}
+  for path in paths:
+    with open(path, 'rb') as f:
+      data = f.read()
+    key = cache_key(data)
+    keys.append(key)
+    if key not in cache: missing[key] = data
+
+  if missing:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+      for key, result in zip(missing, pool.map(analyze_bytes, missing.values(), chunksize=16)):
+        cache[key] = result
+  if prune:
+    for key in set(cache) - set(keys): del cache[key]
+
+  return [dict(cache[key], path=os.path.relpath(path, ROOT)) for path, key in zip(paths, keys)]
+
+
+def rank(cc):
+  for letter, limit in zip('ABCDE', (5, 10, 20, 30, 40)):
+    if cc <= limit: return letter
+  return 'F'
+
+
+def report(result, name='task.py'):
+  # same layout as radon.sh so complexity.txt and com.py keep working
+  if 'error' in result:
+    print("NA")
+    return
+  print("#### Cyclomatic Complexity test")
+  print(name)
+  blocks = result['cc']['blocks']
+  for b in blocks:
+    print(f"    {b['type']} {b['lineno']}:{b['col']} {b['name']} - {rank(b['complexity'])} ({b['complexity']})")
+  print()
+  print(f"{len(blocks)} blocks (classes, functions, methods) analyzed.")
+  average = result['cc']['average']
+  print(f"Average complexity: {rank(average)} ({average})")
+  for title, key in (("multi-line comments", 'mi'), ("no multi-line comments", 'mi_no_multi')):
+    mi = result[key]
+    print(f"#### Maintainability Index score ({title})")
+    print(f"{name} - {'A' if mi > 19 else 'B' if mi > 9 else 'C'} ({mi:.2f})")
+  raw = result['raw']
+  print("#### raw metrics")
+  for header in (name, "** Total **"):
+    print(header)
+    for label, key in (('LOC', 'loc'), ('LLOC', 'lloc'), ('SLOC', 'sloc'), ('Comments', 'comments'),
+                       ('Single comments', 'single_comments'), ('Multi', 'multi'), ('Blank', 'blank')):
+      print(f"    {label}: {raw[key]}")
+    print("    - Comment Stats")
+    loc, sloc = raw['loc'] or 1, raw['sloc'] or 1
+    print(f"        (C % L): {round(raw['comments'] * 100 / loc)}%")
+    print(f"        (C % S): {round(raw['comments'] * 100 / sloc)}%")
+    print(f"        (C + M % L): {round((raw['comments'] + raw['multi']) * 100 / loc)}%")
+  print("#### Halstead complexity metrics (file)")
+  print(f"{name}:")
+  for k, v in result['halstead']['total'].items():
+    print(f"    {k}: {v}")
+  print("#### Halstead complexity metrics (function)")
+  print(f"{name}:")
+  for fn, h in result['halstead']['functions'].items():
+    print(f"    {fn}:")
+    for k, v in h.items():
+      print(f"        {k}: {v}")
+
+
+def main():
+  # python metrics.py task.py prints the radon.sh report for one file,
+  # with no arguments the whole corpus is written to metrics.json
+  if len(sys.argv) > 1:
+    for path in sys.argv[1:]:
+      report(analyze_file(os.path.abspath(path)), os.path.basename(path))
+    return
+
+  start = time.perf_counter()
+  paths = corpus_files()
+  cache = load_cache()
+  cached = set(cache)
+  results = analyze_corpus(paths, cache=cache, prune=True)
+  save_cache(cache)
+  out = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics.json')
+  with open(out, 'w') as f:
+    json.dump({r['path']: r for r in results}, f, indent=1)
+
+  errors = sum(1 for r in results if 'error' in r)
+  print(f"{len(results)} files analyzed ({len(set(cache) - cached)} recomputed, {errors} could not be parsed) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+  main()
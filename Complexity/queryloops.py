@@ -0,0 +1,171 @@
+import ast
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import corpus
+
+# Database access inside loops (the N+1 / query-in-loop shape). A database
+# call is an execute/executemany/executescript or commit call, a
+# sqlite3.connect() call, an ORM `.query` access or a db.session operation; a
+# function defined in the same file counts as one too when it (transitively)
+# makes such a call, so `for user in users: generate_unsubscribe_link(user)`
+# is caught when generate_unsubscribe_link opens a connection. Only code that
+# runs once per iteration is looked at: loop bodies, comprehension elements
+# and conditions, not the expression a loop iterates over.
+#
+#   python queryloops.py            counts per model and task
+#   python queryloops.py <file>     findings of one file
+
+EXECUTE = {'execute', 'executemany', 'executescript', 'commit'}
+SESSION = {'add', 'add_all', 'commit', 'delete', 'execute', 'query', 'get', 'merge', 'flush', 'scalar', 'scalars'}
+LOOPS = (ast.For, ast.AsyncFor, ast.While)
+COMPREHENSIONS = (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def database(node, connects):
+  # kind of database access node is, None if it is not one
+  if isinstance(node, ast.Call):
+    name = corpus.dotted(node.func) or ''
+    if name in connects or name.endswith('sqlite3.connect'): return 'connect'
+    if isinstance(node.func, ast.Attribute):
+      if name.endswith('.session.' + node.func.attr) and node.func.attr in SESSION: return 'session'
+      if node.func.attr in EXECUTE: return node.func.attr
+  if isinstance(node, ast.Attribute) and node.attr == 'query' and isinstance(node.ctx, ast.Load):
+    return 'query'
+  return None
+
+
+def called(node):
+  # name of a same-file function a call may reach: f(...) or self.f(...)
+  if not isinstance(node, ast.Call): return None
+  if isinstance(node.func, ast.Name): return node.func.id
+  if isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Name) \
+      and node.func.value.id in ('self', 'cls'):
+    return node.func.attr
+  return None
+
+
+def repeated(node):
+  # child nodes evaluated once per iteration of the loop or comprehension node
+  if isinstance(node, LOOPS):
+    yield from node.body
+    if isinstance(node, ast.While): yield node.test
+    return
+  first = True
+  for gen in node.generators:
+    if not first: yield gen.iter
+    yield from gen.ifs
+    first = False
+  if isinstance(node, ast.DictComp):
+    yield node.key
+    yield node.value
+  else:
+    yield node.elt
+
+
+def walk(node):
+  # like ast.walk, but does not descend into nested function bodies, which do
+  # not run when they are defined
+  todo = [node]
+  while todo:
+    node = todo.pop()
+    yield node
+    if not isinstance(node, FUNCTIONS + (ast.Lambda,)):
+      todo.extend(ast.iter_child_nodes(node))
+
+
+def body_nodes(function):
+  for statement in function.body:
+    yield from walk(statement)
+
+
+def analyze_source(source):
+  tree = ast.parse(source)
+  connects = {a.asname or a.name for n in ast.walk(tree) if isinstance(n, ast.ImportFrom) and n.module == 'sqlite3'
+              for a in n.names if a.name == 'connect'}
+
+  # functions that reach the database, directly or through each other
+  functions = defaultdict(list)
+  for node in ast.walk(tree):
+    if isinstance(node, FUNCTIONS): functions[node.name].append(node)
+  touches = {name for name, defs in functions.items()
+             if any(database(n, connects) for d in defs for n in body_nodes(d))}
+  calls = {name: {called(n) for d in defs for n in body_nodes(d)} - {None} for name, defs in functions.items()}
+  changed = True
+  while changed:
+    changed = False
+    for name, callees in calls.items():
+      if name not in touches and callees & touches:
+        touches.add(name)
+        changed = True
+
+  findings, seen = [], set()
+  enclosing = {}
+  for function in ast.walk(tree):
+    if isinstance(function, FUNCTIONS):
+      for n in body_nodes(function): enclosing.setdefault(id(n), function.name)
+
+  for loop in ast.walk(tree):
+    if not isinstance(loop, LOOPS + COMPREHENSIONS): continue
+    for child in repeated(loop):
+      for node in walk(child):
+        kind = database(node, connects)
+        if kind is None and called(node) in touches:
+          kind = 'call ' + called(node)
+        if kind is None or id(node) in seen: continue
+        # an access inside nested loops is reported once, for the outermost loop
+        seen.add(id(node))
+        findings.append({'line': node.lineno, 'loop': loop.lineno, 'kind': kind,
+                         'loop_type': type(loop).__name__, 'function': enclosing.get(id(node), '<module>')})
+  return {'findings': sorted(findings, key=lambda f: (f['line'], f['kind'])),
+          'database_functions': sorted(touches)}
+
+
+def analyze_file(path):
+  try:
+    with open(path, encoding='utf-8') as f:
+      return analyze_source(f.read())
+  except (SyntaxError, ValueError, UnicodeDecodeError) as e:
+    return {'error': f"{type(e).__name__}: {e}"}
+
+
+def main():
+  if len(sys.argv) > 1:
+    for path in sys.argv[1:]:
+      result = analyze_file(os.path.abspath(path))
+      print(f"{path}: {result.get('error') or len(result['findings'])} findings")
+      for f in result.get('findings', []):
+        print(f"  {f['line']:>4}  {f['kind']:<32} in {f['loop_type']} at line {f['loop']} ({f['function']})")
+    return
+
+  start = time.perf_counter()
+  rows = corpus.files(corpus.load(), role='app')
+  with ProcessPoolExecutor() as pool:
+    results = list(pool.map(analyze_file, [os.path.join(corpus.ROOT, r['path']) for r in rows], chunksize=16))
+
+  out = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'queryloops.json')
+  with open(out, 'w') as f:
+    json.dump({r['path']: result for r, result in zip(rows, results)}, f, indent=1)
+  print(f"{len(rows)} files analyzed in {time.perf_counter() - start:.2f}s -> {out}\n")
+
+  # files with at least one database access inside a loop / files parsed
+  flagged, parsed = defaultdict(int), defaultdict(int)
+  for r, result in zip(rows, results):
+    if 'error' in result: continue
+    parsed[(r['label'], r['task'])] += 1
+    flagged[(r['label'], r['task'])] += bool(result['findings'])
+  tasks = sorted({k[1] for k in parsed})
+  print(f"{'':<28}" + "".join(f"{'task ' + str(t):>9}" for t in tasks) + f"{'all':>9}")
+  for label in sorted({k[0] for k in parsed}):
+    cells = [f"{flagged[(label, t)]}/{parsed[(label, t)]}" if parsed[(label, t)] else '-' for t in tasks]
+    total = f"{sum(flagged[(label, t)] for t in tasks)}/{sum(parsed[(label, t)] for t in tasks)}"
+    print(f"{label:<28}" + "".join(f"{c:>9}" for c in cells) + f"{total:>9}")
+
+
+if __name__ == '__main__':
+  main()
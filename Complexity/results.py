@@ -0,0 +1,146 @@
+import re
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+# Streaming parser for complexity.txt. The file is read line by line and every
+# number becomes a (task, persona, model, metric, value) record, which are then
+# packed into a columnar table (one small array per field) that the analysis
+# scripts query instead of re-scanning nested lists.
+
+Record = namedtuple('Record', 'task persona model metric value')
+
+SECTIONS = {
+  "Cyclomatic Complexity test": 'cc',
+  "Maintainability Index score (multi-line comments)": 'mi',
+  "Maintainability Index score (no multi-line comments)": 'mi_no_multi',
+  "raw metrics": 'raw',
+  "Halstead complexity metrics (file)": 'hal',
+  "Halstead complexity metrics (function)": 'hal_functions',
+}
+
+# comment ratios in the raw section
+RATIOS = {"(C % L)": 'c_l', "(C % S)": 'c_s', "(C + M % L)": 'cm_l'}
+
+TASK = re.compile(r"# Task (\d+)")
+PERSONA = re.compile(r"## Persona (\d+)")
+BLOCKS = re.compile(r"(\d+) blocks \(classes, functions, methods\) analyzed\.")
+SCORE = re.compile(r"\(([-\d.]+)\)$")
+FIELD = re.compile(r"([^:]+): ([-\d.]+)%?$")
+
+
+def records(lines):
+  task = persona = model = section = None
+  total = False
+  for line in lines:
+    l = line.strip()
+    if not l: continue
+
+    if l.startswith("#### "):
+      section = SECTIONS.get(l[5:])
+      total = False
+    elif l.startswith("### "):
+      model = l[4:]
+      section = None
+    elif l.startswith("## "):
+      persona = int(PERSONA.match(l).group(1))
+      model = section = None
+    elif l.startswith("# "):
+      task = int(TASK.match(l).group(1))
+      persona, model, section = 1, None, None
+
+    elif l == "NA":
+      yield Record(task, persona, model, 'na', 1.0)
+
+    elif section == 'cc':
+      m = BLOCKS.match(l)
+      if m: yield Record(task, persona, model, 'blocks', float(m.group(1)))
+      elif l.startswith("Average complexity:"):
+        yield Record(task, persona, model, 'cc_average', float(SCORE.search(l).group(1)))
+
+    elif section in ('mi', 'mi_no_multi'):
+      yield Record(task, persona, model, section, float(SCORE.search(l).group(1)))
+
+    elif section == 'raw':
+      # per-file numbers are repeated under "** Total **", only keep those
+      if l == "** Total **":
+        total = True
+        continue
+      m = FIELD.match(l)
+      if total and m:
+        name = RATIOS.get(m.group(1), m.group(1).lower().replace(' ', '_'))
+        yield Record(task, persona, model, name, float(m.group(2)))
+
+    elif section == 'hal':
+      m = FIELD.match(l)
+      if m: yield Record(task, persona, model, 'hal_' + m.group(1), float(m.group(2)))
+
+
+class Table:
+  # Columnar store: task/persona are small ints, model/metric are codes into
+  # the `models`/`metrics` name lists and value holds the numbers.
+
+  def __init__(self, task, persona, model, metric, value, models, metrics):
+    self.task = task
+    self.persona = persona
+    self.model = model
+    self.metric = metric
+    self.value = value
+    self.models = list(models)
+    self.metrics = list(metrics)
+
+  @classmethod
+  def from_records(cls, recs):
+    models, metrics = {}, {}
+    columns = ([], [], [], [], [])
+    for r in recs:
+      columns[0].append(r.task)
+      columns[1].append(r.persona)
+      columns[2].append(models.setdefault(r.model, len(models)))
+      columns[3].append(metrics.setdefault(r.metric, len(metrics)))
+      columns[4].append(r.value)
+    return cls(
+      np.array(columns[0], dtype=np.int16),
+      np.array(columns[1], dtype=np.int8),
+      np.array(columns[2], dtype=np.int16),
+      np.array(columns[3], dtype=np.int16),
+      np.array(columns[4], dtype=np.float64),
+      models, metrics,
+    )
+
+  @classmethod
+  def load(cls, path):
+    if path.endswith('.npz'):
+      with np.load(path) as f:
+        return cls(f['task'], f['persona'], f['model'], f['metric'], f['value'],
+                   f['models'].tolist(), f['metrics'].tolist())
+    with open(path) as f:
+      return cls.from_records(records(f))
+
+  def save(self, path):
+    np.savez_compressed(path, task=self.task, persona=self.persona, model=self.model,
+                        metric=self.metric, value=self.value,
+                        models=np.array(self.models), metrics=np.array(self.metrics))
+
+  def __len__(self):
+    return len(self.value)
+
+  def cells(self, metric):
+    # {(task, persona, model name): value} for one metric
+    if metric not in self.metrics: return {}
+    rows = np.flatnonzero(self.metric == self.metrics.index(metric))
+    return {(int(self.task[i]), int(self.persona[i]), self.models[self.model[i]]): float(self.value[i])
+            for i in rows}
+
+
+def main():
+  src = sys.argv[1] if len(sys.argv) > 1 else "complexity.txt"
+  out = sys.argv[2] if len(sys.argv) > 2 else "complexity.npz"
+  table = Table.load(src)
+  table.save(out)
+  print(f"{len(table)} records, {len(table.models)} models, {len(table.metrics)} metrics -> {out}")
+
+
+if __name__ == '__main__':
+  main()
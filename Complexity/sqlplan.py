@@ -0,0 +1,184 @@
+import ast
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import corpus
+import metrics
+
+# Static query-plan check of the raw SQL in the generated apps. Every literal
+# SQL string passed to execute/executemany/executescript is pulled from the
+# AST (directly, through a string constant assigned earlier, or as "..." +
+# "..."), the file's CREATE TABLE/INDEX statements are replayed into an
+# in-memory SQLite database, and EXPLAIN QUERY PLAN is run on every other
+# query. A plan step "SCAN table" without an index is a full-table scan,
+# "USE TEMP B-TREE" a sort the database has to do for ORDER BY, GROUP BY or
+# DISTINCT. ORM (SQLAlchemy) queries are not covered.
+#
+#   python sqlplan.py            per-model table next to cyclomatic complexity
+#   python sqlplan.py <file>     plans of one file
+
+EXECUTE = {'execute', 'executemany', 'executescript'}
+DDL = re.compile(r"^\s*CREATE\s+(?:TEMP(?:ORARY)?\s+)?(?:UNIQUE\s+)?(?:VIRTUAL\s+)?(?:TABLE|INDEX|VIEW)\b", re.I)
+WHERE = re.compile(r"\bWHERE\b", re.I)
+
+
+def literal(node, constants):
+  # string value of a literal, a concatenation of literals or a name bound to one
+  if isinstance(node, ast.Constant) and isinstance(node.value, str):
+    return node.value
+  if isinstance(node, ast.Name):
+    return constants.get(node.id)
+  if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+    left, right = literal(node.left, constants), literal(node.right, constants)
+    if left is not None and right is not None: return left + right
+  return None
+
+
+def extract(tree):
+  # (schema statements, [(line, query)], calls whose SQL is built at runtime)
+  constants = {}
+  for node in ast.walk(tree):
+    if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+      value = literal(node.value, constants)
+      if value is not None: constants[node.targets[0].id] = value
+
+  schema, queries, dynamic = [], [], 0
+  for node in ast.walk(tree):
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+      schema.extend(s for s in split(node.value) if DDL.match(s))
+    if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and node.func.attr in EXECUTE and node.args):
+      continue
+    sql = literal(node.args[0], constants)
+    if sql is None:
+      dynamic += 1
+      continue
+    queries.extend((node.lineno, s) for s in split(sql) if not DDL.match(s))
+  return schema, sorted(queries), dynamic
+
+
+def split(script):
+  # statements of a script; complete_statement keeps ';' inside literals intact
+  out, current = [], ''
+  for part in script.split(';'):
+    current += part + ';'
+    if sqlite3.complete_statement(current):
+      if current.strip(' \t\r\n;'): out.append(current.strip())
+      current = ''
+  if current.strip(' \t\r\n;'): out.append(current.strip())
+  return out
+
+
+class Any(dict):
+  # binds every named parameter to NULL
+  def __missing__(self, key):
+    return None
+
+
+def explain(conn, sql):
+  # plan detail lines, or raises sqlite3.Error
+  try:
+    return [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+  except sqlite3.ProgrammingError as e:
+    m = re.search(r"uses (\d+)", str(e))
+    if m: return [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, [None] * int(m.group(1)))]
+    return [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, Any())]
+
+
+def analyze_source(source):
+  tree = ast.parse(source)
+  schema, queries, dynamic = extract(tree)
+  conn = sqlite3.connect(':memory:')
+  for statement in schema:
+    try:
+      conn.execute(statement)
+    except sqlite3.Error:
+      pass
+
+  plans = []
+  for line, sql in queries:
+    entry = {'line': line, 'sql': ' '.join(sql.split())}
+    try:
+      entry['plan'] = explain(conn, sql)
+    except sqlite3.Error as e:
+      entry['error'] = str(e)
+    else:
+      entry['scans'] = [p for p in entry['plan'] if p.startswith('SCAN') and 'USING' not in p]
+      entry['sorts'] = [p for p in entry['plan'] if 'TEMP B-TREE' in p]
+      entry['filtered'] = bool(WHERE.search(sql))
+    plans.append(entry)
+  conn.close()
+
+  explained = [p for p in plans if 'plan' in p]
+  return {
+    'tables': sum(1 for s in schema if re.match(r"\s*CREATE\s+(?:TEMP\w*\s+)?(?:VIRTUAL\s+)?TABLE", s, re.I)),
+    'indexes': sum(1 for s in schema if re.search(r"\bINDEX\b", s.split('(')[0], re.I)),
+    'queries': len(queries), 'dynamic': dynamic, 'explained': len(explained),
+    'full_scans': sum(1 for p in explained if p['scans']),
+    # full scans of queries that filter, i.e. lookups an index would answer
+    'lookup_scans': sum(1 for p in explained if p['scans'] and p['filtered']),
+    'temp_sorts': sum(1 for p in explained if p['sorts']),
+    'plans': plans,
+  }
+
+
+def analyze_file(path):
+  try:
+    with open(path, encoding='utf-8') as f:
+      return analyze_source(f.read())
+  except (SyntaxError, ValueError, UnicodeDecodeError) as e:
+    return {'error': f"{type(e).__name__}: {e}"}
+
+
+def main():
+  if len(sys.argv) > 1:
+    for path in sys.argv[1:]:
+      result = analyze_file(os.path.abspath(path))
+      print(f"{path}: {result.get('error') or ''}")
+      for p in result.get('plans', []):
+        flags = ' '.join(f for f, on in (('SCAN', p.get('scans')), ('SORT', p.get('sorts'))) if on)
+        print(f"  {p['line']:>4} {flags or p.get('error', 'ok'):<10} {p['sql'][:100]}")
+        for step in p.get('plan', []):
+          print(f"         {step}")
+    return
+
+  start = time.perf_counter()
+  conn = corpus.load()
+  rows = corpus.files(conn, role='app')
+  paths = [os.path.join(corpus.ROOT, r['path']) for r in rows]
+  with ProcessPoolExecutor() as pool:
+    results = list(pool.map(analyze_file, paths, chunksize=16))
+  cc = {r['path'].replace(os.sep, '/'): r for r in metrics.analyze_corpus(paths, cache=metrics.load_cache())}
+
+  out = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sqlplan.json')
+  with open(out, 'w') as f:
+    json.dump({r['path']: result for r, result in zip(rows, results)}, f, indent=1)
+  print(f"{len(rows)} files analyzed in {time.perf_counter() - start:.2f}s -> {out}\n")
+
+  # per model: average cyclomatic complexity next to the share of explained
+  # queries that scan a whole table (all scans, scans despite a WHERE clause)
+  # or sort in a temporary B-tree
+  totals = defaultdict(lambda: defaultdict(float))
+  for r, result in zip(rows, results):
+    t = totals[r['label']]
+    if 'cc' in cc[r['path']]:
+      t['cc'] += cc[r['path']]['cc']['average']
+      t['files'] += 1
+    for key in ('queries', 'explained', 'full_scans', 'lookup_scans', 'temp_sorts', 'indexes'):
+      t[key] += result.get(key, 0)
+
+  print(f"{'':<28}{'CC':>6}{'queries':>9}{'scans':>8}{'lookup':>8}{'sorts':>8}{'indexes':>9}")
+  for label, t in sorted(totals.items()):
+    share = lambda k: f"{100 * t[k] / t['explained']:.0f}%" if t['explained'] else '-'
+    print(f"{label:<28}{t['cc'] / max(t['files'], 1):>6.2f}{t['queries']:>9.0f}{share('full_scans'):>8}"
+          f"{share('lookup_scans'):>8}{share('temp_sorts'):>8}{t['indexes']:>9.0f}")
+
+
+if __name__ == '__main__':
+  main()
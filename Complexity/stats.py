@@ -0,0 +1,133 @@
+import sys
+import time
+import warnings
+
+import numpy as np
+
+import imports
+import warehouse
+from cube import Cube
+
+# Bootstrap confidence intervals and permutation tests over a Cube. Every
+# table cell averages a handful of tasks, so tasks are what gets resampled:
+# a resample is a row of task counts drawn from a multinomial, and the
+# statistic of every cell for every resample is one matrix product of those
+# counts with the per-task sums (and counts of non-NaN values) of the cells.
+# No Python loop runs per resample or per cell.
+#
+#   python stats.py          95% intervals per model and persona, P1 vs P2 tests
+
+RESAMPLES = 10000
+SEED = 20240611
+LEVEL = 0.95
+
+METRICS = ('cc_average', 'loc', 'c_l', 'ext_libs', 'consistency')
+
+
+def per_task(cube, keep, over):
+  # (sums, counts, labels): non-NaN sums and counts with shape (cells, tasks)
+  # for every combination of the keep axes; every other axis is pooled
+  keep = [a for a in cube.axes if a in keep]
+  rest = [a for a in cube.axes if a not in keep and a != over]
+  order = [cube.axis(a) for a in keep + [over] + rest]
+  data = np.transpose(cube.data, order)
+  shape = data.shape[:len(keep)]
+  data = data.reshape(int(np.prod(shape)), data.shape[len(keep)], -1)
+  valid = ~np.isnan(data)
+  return np.where(valid, data, 0).sum(-1), valid.sum(-1), {a: cube.labels[a] for a in keep}
+
+
+def reshape(values, labels):
+  return Cube(values.reshape([len(v) for v in labels.values()]), labels)
+
+
+def bootstrap(cube, keep=('model', 'persona', 'metric'), over='task', resamples=RESAMPLES, level=LEVEL, seed=SEED):
+  # (mean, low, high) Cubes over the keep axes; the mean pools every value of
+  # a cell like Cube.mean does, the interval is the percentile interval of the
+  # same statistic over resampled tasks
+  sums, counts, labels = per_task(cube, keep, over)
+  rng = np.random.default_rng(seed)
+  n = sums.shape[1]
+  draws = rng.multinomial(n, np.full(n, 1 / n), size=resamples).T.astype(float)  # (tasks, resamples)
+  with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+    warnings.simplefilter('ignore', RuntimeWarning)
+    mean = sums.sum(1) / counts.sum(1)
+    stats = (sums @ draws) / (counts @ draws)
+    low, high = np.nanpercentile(stats, [50 * (1 - level), 50 * (1 + level)], axis=1)
+  return reshape(mean, labels), reshape(low, labels), reshape(high, labels)
+
+
+def permutation(cube, a, b, axis='persona', keep=('model', 'metric'), over='task', resamples=RESAMPLES, seed=SEED):
+  # (mean difference a - b, two-sided p) Cubes over the keep axes. Tasks are
+  # paired: the per-task difference of a and b keeps or flips its sign at
+  # random, tasks missing either side are left out
+  sums_a, counts_a, labels = per_task(cube.sel(**{axis: a}), keep, over)
+  sums_b, counts_b, _ = per_task(cube.sel(**{axis: b}), keep, over)
+  with np.errstate(invalid='ignore', divide='ignore'):
+    diff = sums_a / counts_a - sums_b / counts_b
+  valid = ~np.isnan(diff)
+  diff = np.where(valid, diff, 0)
+  pairs = valid.sum(1)
+
+  rng = np.random.default_rng(seed)
+  signs = rng.choice([-1.0, 1.0], size=(diff.shape[1], resamples))
+  with np.errstate(invalid='ignore', divide='ignore'):
+    observed = diff.sum(1) / pairs
+    permuted = (diff @ signs) / pairs[:, None]
+  extreme = (np.abs(permuted) >= np.abs(observed)[:, None] - 1e-12).sum(1)
+  p = np.where(pairs > 0, (extreme + 1) / (resamples + 1), np.nan)
+  return reshape(observed, labels), reshape(p, labels)
+
+
+def metrics_cube(conn, models, metrics=METRICS):
+  # complexity.txt metrics, third-party libraries (imports.py) and the mean
+  # hand-graded consistency (1 identical .. 3 different) in one Cube
+  base = [m for m in metrics if m not in ('ext_libs', 'consistency')]
+  c = warehouse.cube(conn, base, models)
+  extra = []
+  if 'ext_libs' in metrics:
+    libs = np.array(imports.ext_libs(models, personas=warehouse.PERSONAS), dtype=float)
+    libs[libs < 0] = np.nan
+    # (task, persona, model)
+    extra.append(libs.reshape(len(libs), len(warehouse.PERSONAS), len(models)))
+  if 'consistency' in metrics:
+    grades = np.stack([warehouse.grades(conn, kind, models) for kind in ('syntax', 'function', 'semantics')]).astype(float)
+    grades[grades == 0] = np.nan
+    with warnings.catch_warnings():
+      warnings.simplefilter('ignore', RuntimeWarning)
+      extra.append(np.nanmean(grades, axis=0).transpose(2, 1, 0))
+  data = np.concatenate([c.data] + [e[:, :, :, None, None] for e in extra], axis=-1)
+  labels = dict(c.labels, metric=base + [m for m in ('ext_libs', 'consistency') if m in metrics])
+  return Cube(data, labels).sel(metric=list(metrics))
+
+
+def interval(mean, low, high, digits=2):
+  # "m [lo, hi]", or NA when the cell has no data
+  if np.isnan(mean): return "NA"
+  return f"{round(float(mean), digits)} [{round(float(low), digits)}, {round(float(high), digits)}]"
+
+
+def main():
+  models = sys.argv[1:] or ['GPT-3.5', 'GPT-4', 'Gemini']
+  conn = warehouse.build(sources=['complexity.txt', 'hand'])
+  cube = metrics_cube(conn, models)
+
+  start = time.perf_counter()
+  mean, low, high = bootstrap(cube)
+  diff, p = permutation(cube, 'software', 'security')
+  elapsed = time.perf_counter() - start
+  cells = cube.data.shape[1] * cube.data.shape[2] * cube.data.shape[4]
+  print(f"{RESAMPLES} resamples of {cells} cells and {cells // 2} paired tests in {elapsed * 1000:.0f} ms\n")
+
+  print(f"{'':<28}" + "".join(f"{m:>24}" for m in METRICS))
+  for i, model in enumerate(models):
+    for j, persona in enumerate(warehouse.PERSONAS):
+      print(f"{model + ' (' + persona + ')':<28}" +
+            "".join(f"{interval(mean.data[j, i, k], low.data[j, i, k], high.data[j, i, k]):>24}"
+                    for k in range(len(METRICS))))
+    print(f"{'  software - security':<28}" +
+          "".join(f"{f'{diff.data[i, k]:+.2f} (p={p.data[i, k]:.3f})':>24}" for k in range(len(METRICS))))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,101 @@
+import math
+
+import pytest
+
+import corpus
+import metrics
+
+radon_complexity = pytest.importorskip('radon.complexity')
+radon_metrics = pytest.importorskip('radon.metrics')
+radon_raw = pytest.importorskip('radon.raw')
+radon_visitors = pytest.importorskip('radon.visitors')
+
+# metrics.py has to give the numbers radon gives, since complexity.txt and the
+# published tables came from radon.sh
+#
+#   python -m pytest Complexity
+
+SAMPLES = [
+  # per-function Halstead counts, nested functions folded into the outer one
+  """
+def add(a, b):
+  def twice(x):
+    return x * 2 + 1
+  return twice(a) + b - (a and b)
+
+class Cart:
+  def total(self, items):
+    n = 0
+    for i in items:
+      n += i.price * i.qty
+    return n if n > 0 else -n
+""",
+  # radon does not count the decisions inside an assert
+  """
+def check(a, b, c):
+  assert a and b or c, 'bad'
+  assert [x for x in a if x or b]
+  return a or b
+""",
+  # nested classes are not blocks and add nothing to their parent
+  """
+class Card(Model):
+  number = Column(String)
+
+  class Meta:
+    ordering = ['-id'] if DESC else ['id']
+
+    def label(self):
+      return 'a' if self else 'b'
+
+  def masked(self):
+    return '*' * 12 + self.number[-4:] if self.number else ''
+
+
+def factory():
+  class Local:
+    def get(self, x):
+      return x or 0
+  return Local
+""",
+]
+
+
+def same(mine, theirs):
+  return all(math.isclose(mine[k], v, rel_tol=1e-9, abs_tol=1e-9) for k, v in theirs._asdict().items())
+
+
+def compare(source):
+  result = metrics.analyze_source(source)
+  hal = radon_metrics.h_visit(source)
+  assert same(result['halstead']['total'], hal.total)
+  # radon lists functions with the same name twice, the dict keeps the last
+  for name, report in dict(hal.functions).items():
+    assert same(result['halstead']['functions'][name], report), name
+  assert set(result['halstead']['functions']) == {name for name, _ in hal.functions}
+  assert result['cc']['total'] == radon_visitors.ComplexityVisitor.from_code(source).total_complexity
+
+  # the block list and average radon cc prints, MI and raw metrics
+  blocks = radon_complexity.cc_visit(source)
+  assert sorted((b['type'], b['name'], b['lineno'], b['col'], b['complexity']) for b in result['cc']['blocks']) == \
+         sorted((b.letter, b.fullname, b.lineno, b.col_offset, b.complexity) for b in blocks)
+  assert math.isclose(result['cc']['average'], radon_complexity.average_complexity(blocks))
+  assert math.isclose(result['mi'], radon_metrics.mi_visit(source, True))
+  assert math.isclose(result['mi_no_multi'], radon_metrics.mi_visit(source, False))
+  assert result['raw'] == radon_raw.analyze(source)._asdict()
+
+
+@pytest.mark.parametrize('source', SAMPLES)
+def test_samples(source):
+  compare(source)
+
+
+def test_corpus():
+  for path in corpus.paths():
+    with open(path, encoding='utf-8') as f:
+      try:
+        source = f.read()
+        compile(source, path, 'exec')
+      except (SyntaxError, ValueError, UnicodeDecodeError):
+        continue
+    compare(source)
@@ -0,0 +1,404 @@
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+import corpus
+import metrics
+import security
+from cube import Cube
+from results import Table
+
+# SQLite warehouse of every evaluation result. Each tool keeps writing its own
+# output (complexity.txt, metrics_cache.json, consistency/scores.csv,
+# Runtime/benchmarks.json, ...); build() loads them into normalized tables
+# keyed by model, persona, task and run, and the graph and LaTeX scripts query
+# the slice they need instead of re-parsing those files. Every source has a
+# stamp (file size and mtime, or the manifest hashes for the ones computed
+# from the outputs), so a rebuild only reloads the sources that changed.
+#
+#   python warehouse.py          rebuild and print what every table holds
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WAREHOUSE = os.path.join(HERE, 'warehouse.db')
+COMPLEXITY = os.path.join(HERE, 'complexity.txt')
+QUERYLOOPS = os.path.join(HERE, 'queryloops.json')
+SQLPLAN = os.path.join(HERE, 'sqlplan.json')
+GRADES = os.path.join(corpus.ROOT, 'consistency', 'grades.csv')
+SCORES = os.path.join(corpus.ROOT, 'consistency', 'scores.csv')
+SEMANTICS = os.path.join(corpus.ROOT, 'consistency', 'semantics.csv')
+DIFFERENTIAL = os.path.join(corpus.ROOT, 'Runtime', 'differential.csv')
+BENCHMARKS = os.path.join(corpus.ROOT, 'Runtime', 'benchmarks.json')
+STARTUP = os.path.join(corpus.ROOT, 'Runtime', 'startup.json')
+FUZZ = os.path.join(corpus.ROOT, 'Runtime', 'fuzz.json')
+
+# P1 and P2 of complexity.txt and the hand-graded lists
+PERSONAS = ('software', 'security')
+# complexity.txt names the outputs in chat_gpt/gpt4 GPT-4o
+LABELS = {'GPT-4o': 'GPT-4'}
+
+KEY = "model TEXT NOT NULL, persona TEXT NOT NULL, task INTEGER, run INTEGER"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sources (
+  name TEXT PRIMARY KEY,
+  stamp TEXT NOT NULL,
+  loaded REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+  path TEXT PRIMARY KEY, {KEY},
+  source TEXT NOT NULL, variant TEXT NOT NULL, reliability INTEGER NOT NULL, side TEXT, role TEXT NOT NULL,
+  sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+  source TEXT NOT NULL, path TEXT, {KEY},
+  metric TEXT NOT NULL, value REAL
+);
+CREATE TABLE IF NOT EXISTS consistency_scores (
+  source TEXT NOT NULL, {KEY}, path_a TEXT, path_b TEXT,
+  kind TEXT NOT NULL, score REAL, grade INTEGER
+);
+CREATE TABLE IF NOT EXISTS benchmark_runs (
+  source TEXT NOT NULL, path TEXT NOT NULL, {KEY},
+  users INTEGER NOT NULL, requests INTEGER, rps REAL, errors INTEGER, p50 REAL, p95 REAL, p99 REAL
+);
+CREATE TABLE IF NOT EXISTS findings (
+  source TEXT NOT NULL, path TEXT NOT NULL, {KEY},
+  rule TEXT NOT NULL, line INTEGER, detail TEXT
+);
+CREATE INDEX IF NOT EXISTS files_key ON files (model, persona, task, run);
+CREATE INDEX IF NOT EXISTS metrics_key ON metrics (model, persona, task, run);
+CREATE INDEX IF NOT EXISTS metrics_name ON metrics (source, metric);
+CREATE INDEX IF NOT EXISTS consistency_key ON consistency_scores (model, persona, task, run);
+CREATE INDEX IF NOT EXISTS consistency_kind ON consistency_scores (source, kind);
+CREATE INDEX IF NOT EXISTS benchmark_key ON benchmark_runs (model, persona, task, run);
+CREATE INDEX IF NOT EXISTS findings_key ON findings (model, persona, task, run);
+CREATE INDEX IF NOT EXISTS findings_rule ON findings (source, rule);
+"""
+
+TABLES = ('files', 'metrics', 'consistency_scores', 'benchmark_runs', 'findings')
+
+
+def columns(conn, table):
+  return [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def file_stamp(path):
+  if not os.path.exists(path): return ''
+  st = os.stat(path)
+  return f"{st.st_size}:{st.st_mtime}"
+
+
+def manifest_stamp(manifest, version=''):
+  digest = hashlib.sha256(str(version).encode())
+  for r in corpus.files(manifest):
+    digest.update(f"{r['path']}\0{r['sha256']}\n".encode())
+  return digest.hexdigest()
+
+
+def keyed(manifest):
+  # path -> model, persona, task and run of the manifest
+  return {r['path']: dict(model=r['label'], persona=r['persona'], task=r['task'], run=r['run'])
+          for r in corpus.files(manifest)}
+
+
+def read_csv(path):
+  with open(path, newline='') as f:
+    return list(csv.DictReader(f))
+
+
+def number(value, kind=float):
+  return kind(value) if value not in (None, '') else None
+
+
+# Loaders return the rows of one source as dicts of the table's columns,
+# source excluded; a missing output file loads as no rows.
+
+def load_files(manifest):
+  return [dict(path=r['path'], model=r['label'], persona=r['persona'], task=r['task'], run=r['run'],
+               variant=r['variant'], reliability=r['reliability'], side=r['side'], role=r['role'],
+               sha256=r['sha256']) for r in corpus.files(manifest)]
+
+
+def load_complexity(manifest):
+  table = Table.load(COMPLEXITY)
+  rows = []
+  for i in range(len(table)):
+    model = table.models[table.model[i]]
+    rows.append(dict(path=None, model=LABELS.get(model, model), persona=PERSONAS[table.persona[i] - 1],
+                     task=int(table.task[i]), run=1, metric=table.metrics[table.metric[i]],
+                     value=float(table.value[i])))
+  return rows
+
+
+def load_metrics(manifest):
+  # per-file numbers of metrics.py under the names complexity.txt uses
+  files = corpus.files(manifest)
+  cache = metrics.load_cache()
+  results = metrics.analyze_corpus([os.path.join(corpus.ROOT, r['path']) for r in files], cache=cache, prune=True)
+  metrics.save_cache(cache)
+  rows = []
+  for r, result in zip(files, results):
+    if 'error' in result: continue
+    values = {'blocks': len(result['cc']['blocks']), 'cc_average': result['cc']['average'],
+              'cc_total': result['cc']['total'], 'mi': result['mi'], 'mi_no_multi': result['mi_no_multi']}
+    values.update(result['raw'])
+    values.update({'hal_' + k: v for k, v in result['halstead']['total'].items()})
+    for metric, value in values.items():
+      if isinstance(value, (int, float)):
+        rows.append(dict(path=r['path'], model=r['label'], persona=r['persona'], task=r['task'], run=r['run'],
+                         metric=metric, value=float(value)))
+  return rows
+
+
+def load_grades(manifest):
+  return [dict(model=g['model'], persona=g['persona'], task=int(g['task']), run=None, path_a=None, path_b=None,
+               kind=g['kind'], score=None, grade=int(g['grade'])) for g in read_csv(GRADES)]
+
+
+def load_scores(manifest):
+  rows = []
+  if os.path.exists(SCORES):
+    for s in read_csv(SCORES):
+      for kind in ('syntax', 'structure'):
+        rows.append(dict(model=s['label'], persona=s['persona'], task=int(s['task']), run=int(s['run']),
+                         path_a=s['path_a'], path_b=s['path_b'], kind=kind,
+                         score=number(s[kind + '_similarity']), grade=number(s[kind], int)))
+  return rows
+
+
+def load_semantics(manifest):
+  # tree edit distances; kind tells reliability pairs from cross-model ones
+  rows = []
+  if os.path.exists(SEMANTICS):
+    for s in read_csv(SEMANTICS):
+      rows.append(dict(model=s['label_a'], persona=s['persona'], task=int(s['task']), run=int(s['run_a']),
+                       path_a=s['path_a'], path_b=s['path_b'], kind=s['kind'].replace('-', '_') + '_distance',
+                       score=number(s['semantic_distance']), grade=None))
+  return rows
+
+
+def load_differential(manifest):
+  # share of scripted requests on which both apps of a pair behave the same
+  rows = []
+  if os.path.exists(DIFFERENTIAL):
+    for d in read_csv(DIFFERENTIAL):
+      rows.append(dict(model=d['label'], persona=d['persona'], task=int(d['task']), run=int(d['run']),
+                       path_a=d['path_a'], path_b=d['path_b'], kind='trace',
+                       score=int(d['same']) / int(d['steps']), grade=None))
+  return rows
+
+
+def load_benchmarks(manifest):
+  rows = []
+  if os.path.exists(BENCHMARKS):
+    with open(BENCHMARKS) as f:
+      runs = json.load(f)
+    for p, v in runs.items():
+      for users, level in v.get('levels', {}).items():
+        rows.append(dict(path=p, model=v['label'], persona=v['persona'], task=v['task'], run=v['run'],
+                         users=int(users), **{k: level[k] for k in ('requests', 'rps', 'errors', 'p50', 'p95', 'p99')}))
+  return rows
+
+
+def load_startup(manifest):
+  # startup cost of every app that started, as per-file metrics
+  rows = []
+  if os.path.exists(STARTUP):
+    with open(STARTUP) as f:
+      runs = json.load(f)
+    for p, v in runs.items():
+      if v['error']: continue
+      values = {'startup_s': v['startup'], 'import_s': v['seconds']['import'], 'setup_s': v['seconds']['setup'],
+                'startup_statements': sum(v['statements'].values()), 'peak_rss_kb': v['peak_rss_kb']}
+      if 'first_request' in v: values['first_request_s'] = v['first_request']['seconds']
+      for metric, value in values.items():
+        rows.append(dict(path=p, model=v['label'], persona=v['persona'], task=v['task'], run=v['run'],
+                         metric=metric, value=float(value)))
+  return rows
+
+
+def load_security(manifest):
+  keys = keyed(manifest)
+  rows = []
+  for p, result in security.analyze_corpus(manifest, role='app').items():
+    for f in result.get('findings', []):
+      rows.append(dict(path=p, **keys[p], **f))
+  return rows
+
+
+def load_queryloops(manifest):
+  keys, rows = keyed(manifest), []
+  if os.path.exists(QUERYLOOPS):
+    with open(QUERYLOOPS) as f:
+      for p, result in json.load(f).items():
+        if p not in keys: continue
+        for q in result.get('findings', []):
+          rows.append(dict(path=p, **keys[p],
+                           rule='query_in_loop', line=q['line'], detail=f"{q['kind']} in {q['function']}"))
+  return rows
+
+
+def load_sqlplan(manifest):
+  keys, rows = keyed(manifest), []
+  if os.path.exists(SQLPLAN):
+    with open(SQLPLAN) as f:
+      for p, result in json.load(f).items():
+        if p not in keys: continue
+        for plan in result.get('plans', []):
+          for rule, on in (('full_scan', plan.get('scans')), ('temp_sort', plan.get('sorts'))):
+            if on:
+              rows.append(dict(path=p, **keys[p],
+                               rule=rule, line=plan['line'], detail=plan['sql'][:200]))
+  return rows
+
+
+def load_fuzz(manifest):
+  # one finding per distinct crash; the line is the innermost app frame
+  keys, rows = keyed(manifest), []
+  if os.path.exists(FUZZ):
+    with open(FUZZ) as f:
+      for p, result in json.load(f).items():
+        if p not in keys: continue
+        for c in result.get('crashes', []):
+          frame = c['signature'].split(' > ')[-1].rsplit(':', 1)[-1]
+          rows.append(dict(path=p, **keys[p], rule=c['signature'].split(' ')[0],
+                           line=int(frame) if frame.isdigit() else None, detail=f"{c['route']}: {c['signature']}"))
+  return rows
+
+
+# name -> (table, stamp, loader); the stamp changes whenever the source does
+SOURCES = {
+  'corpus.py': ('files', lambda m: manifest_stamp(m), load_files),
+  'complexity.txt': ('metrics', lambda m: file_stamp(COMPLEXITY), load_complexity),
+  'metrics.py': ('metrics', lambda m: manifest_stamp(m, metrics.VERSION), load_metrics),
+  'hand': ('consistency_scores', lambda m: file_stamp(GRADES), load_grades),
+  'score.py': ('consistency_scores', lambda m: file_stamp(SCORES), load_scores),
+  'ted.py': ('consistency_scores', lambda m: file_stamp(SEMANTICS), load_semantics),
+  'differential.py': ('consistency_scores', lambda m: file_stamp(DIFFERENTIAL), load_differential),
+  'benchmark.py': ('benchmark_runs', lambda m: file_stamp(BENCHMARKS), load_benchmarks),
+  'startup.py': ('metrics', lambda m: file_stamp(STARTUP), load_startup),
+  'security.py': ('findings', lambda m: manifest_stamp(m, security.VERSION), load_security),
+  'queryloops.py': ('findings', lambda m: file_stamp(QUERYLOOPS), load_queryloops),
+  'sqlplan.py': ('findings', lambda m: file_stamp(SQLPLAN), load_sqlplan),
+  'fuzz.py': ('findings', lambda m: file_stamp(FUZZ), load_fuzz),
+}
+
+
+def connect(db=WAREHOUSE):
+  conn = sqlite3.connect(db)
+  conn.row_factory = sqlite3.Row
+  conn.executescript(SCHEMA)
+  return conn
+
+
+def build(db=WAREHOUSE, manifest=None, sources=None):
+  # reload the sources whose stamp changed since the last build; sources=None
+  # means all of them, [] none
+  conn = connect(db)
+  if sources is None: sources = SOURCES
+  if not sources: return conn
+  manifest = manifest or corpus.load()
+  stamps = {r['name']: r['stamp'] for r in conn.execute("SELECT name, stamp FROM sources")}
+  for name in sources:
+    table, stamp, load = SOURCES[name]
+    stamp = stamp(manifest)
+    if stamps.get(name) == stamp: continue
+    rows = load(manifest)
+    names = columns(conn, table)
+    with conn:
+      conn.execute(f"DELETE FROM {table} WHERE source = ?", (name,))
+      conn.executemany(f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                       [tuple(name if c == 'source' else r.get(c) for c in names) for r in rows])
+      conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (name, stamp, time.time()))
+  return conn
+
+
+def select(conn, table, **where):
+  # rows matching the given column values; a list or tuple matches any of its
+  # values, e.g. select(conn, 'metrics', model=['GPT-4', 'Gemini'], metric='loc')
+  if table not in TABLES: raise ValueError(f"unknown table: {table}")
+  unknown = set(where) - set(columns(conn, table))
+  if unknown: raise ValueError(f"unknown {table} columns: {', '.join(sorted(unknown))}")
+  clauses, args = [], []
+  for k, v in where.items():
+    if isinstance(v, (list, tuple)):
+      # IN never matches NULL, so None in the list becomes IS NULL
+      values = [x for x in v if x is not None]
+      clause = f"{k} IN ({', '.join('?' * len(values))})"
+      if len(values) < len(v): clause = f"({clause} OR {k} IS NULL)"
+      clauses.append(clause)
+      args.extend(values)
+    else:
+      clauses.append(f"{k} IS ?")
+      args.append(v)
+  sql = f"SELECT * FROM {table}" + (f" WHERE {' AND '.join(clauses)}" if clauses else "")
+  return conn.execute(sql, args).fetchall()
+
+
+def cube(conn, names, models, source='complexity.txt', personas=PERSONAS, tasks=range(1, 10), **where):
+  # metrics as a Cube (task, persona, model, run, metric); where filters the
+  # files a per-file source is read from (role='app', reliability=0, ...).
+  # Several files of one cell are averaged, cells without any are NaN
+  sql = f"""SELECT task, persona, model, COALESCE(run, 1) run, metric, AVG(value) value FROM metrics
+            WHERE source = ? AND metric IN ({', '.join('?' * len(names))})"""
+  args = [source, *names]
+  if where:
+    unknown = set(where) - set(columns(conn, 'files'))
+    if unknown: raise ValueError(f"unknown files columns: {', '.join(sorted(unknown))}")
+    sql += f" AND path IN (SELECT path FROM files WHERE {' AND '.join(f'{k} IS ?' for k in where)})"
+    args.extend(where.values())
+  rows = conn.execute(sql + " GROUP BY task, persona, model, run, metric", args).fetchall()
+
+  runs = sorted({r['run'] for r in rows}) or [1]
+  labels = {'task': list(tasks), 'persona': list(personas), 'model': list(models), 'run': runs, 'metric': list(names)}
+  data = np.full([len(v) for v in labels.values()], np.nan)
+  for r in rows:
+    key = (r['task'], r['persona'], r['model'], r['run'], r['metric'])
+    if all(k in v for k, v in zip(key, labels.values())):
+      data[tuple(v.index(k) for k, v in zip(key, labels.values()))] = r['value']
+  return Cube(data, labels)
+
+
+def cells(conn, metric, source='complexity.txt'):
+  # {(task, persona number, model): value}, the shape results.Table.cells has
+  return {(r['task'], PERSONAS.index(r['persona']) + 1, r['model']): r['value']
+          for r in select(conn, 'metrics', source=source, metric=metric, run=[1, None])}
+
+
+def grades(conn, kind, models, source='hand', personas=PERSONAS, tasks=range(1, 10)):
+  # grades as an int array (model, persona, task), 0 where there is none; the
+  # median of the runs when a source grades several
+  out = np.zeros((len(models), len(personas), len(tasks)), dtype=int)
+  found = {}
+  for r in select(conn, 'consistency_scores', source=source, kind=kind, model=list(models)):
+    if r['grade'] is not None:
+      found.setdefault((r['model'], r['persona'], r['task']), []).append(r['grade'])
+  for i, model in enumerate(models):
+    for j, persona in enumerate(personas):
+      for k, task in enumerate(tasks):
+        g = found.get((model, persona, task))
+        if g: out[i, j, k] = int(np.ceil(np.median(g)))
+  return out
+
+
+def main():
+  start = time.perf_counter()
+  conn = build(sys.argv[1] if len(sys.argv) > 1 else WAREHOUSE)
+  print(f"warehouse built in {time.perf_counter() - start:.2f}s")
+  for r in conn.execute("SELECT name, stamp, loaded FROM sources ORDER BY name"):
+    print(f"  {r['name']:<16} loaded {time.strftime('%Y-%m-%d %H:%M', time.localtime(r['loaded']))}")
+  for table in TABLES:
+    print(f"\n{table}")
+    group = 'source' if table != 'files' else 'role'
+    for r in conn.execute(f"SELECT {group}, COUNT(*) n, COUNT(DISTINCT model) models FROM {table} GROUP BY {group}"):
+      print(f"  {r[0]:<16} {r['n']:>7} rows {r['models']:>3} models")
+
+
+if __name__ == '__main__':
+  main()
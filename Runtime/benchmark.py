@@ -0,0 +1,187 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+import fixtures
+import loader
+import sandbox
+import scripts
+import sqlstats
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'Complexity'))
+import corpus
+
+# Throughput and latency of every generated app under the workload of its
+# task (scripts.WORKLOADS: task 2 views a product and adds it to the cart,
+# task 7 logs in and opens the protected page, ...). Apps run in-process
+# through their WSGI callable, one forkserver child per app (loader.py); at
+# each concurrency level that many simulated users, each with its own session
+# and account, repeat the timed steps until REQUESTS requests were made or
+# DURATION seconds passed; every level starts from the seeded databases of the
+# app, restored by fixtures.py. Every timed request also counts its SQL
+# statements, SQL time, connections opened, pool checkouts and commits
+# (sqlstats.py). Results are written to benchmarks.json next to the other
+# per-file metrics.
+#
+#   python benchmark.py [file ...]
+#   python benchmark.py --task 9 Complexity/task.py    a file outside the manifest
+
+LEVELS = (1, 4, 16)  # concurrent simulated users
+REQUESTS = 200       # requests per level
+DURATION = 5.0       # seconds per level at most
+LIMIT = 120          # seconds for one app, all levels included
+
+
+def prepare(app, steps):
+  # (path, test_client kwargs) for the steps the app serves
+  out = []
+  for name, method, candidates, payload in steps:
+    path = scripts.route(app, method, candidates)
+    if path is not None: out.append((path, scripts.request(app, method, path, payload)))
+  return out
+
+
+def level(app, task, users):
+  # latencies (seconds), wall time, server errors and SQL totals of one
+  # concurrency level
+  latencies, errors, lock = [], [0], threading.Lock()
+  sql = dict.fromkeys(sqlstats.FIELDS, 0)
+  clients = []
+  for u in range(users):
+    setup, timed = scripts.workload(task, f"{users}-{u}")
+    client = app.test_client()
+    for path, kwargs in prepare(app, setup):
+      client.open(path, **kwargs)
+    clients.append((client, prepare(app, timed)))
+  stop = time.perf_counter() + DURATION
+
+  def user(client, steps):
+    while True:
+      for path, kwargs in steps:
+        with lock:
+          if len(latencies) >= REQUESTS or time.perf_counter() > stop: return
+        start = time.perf_counter()
+        with sqlstats.measure() as used:
+          try:
+            status = client.open(path, **kwargs).status_code
+          except Exception:
+            status = 500
+        elapsed = time.perf_counter() - start
+        with lock:
+          latencies.append(elapsed)
+          errors[0] += status >= 500
+          for k, v in used.items(): sql[k] += v
+
+  start = time.perf_counter()
+  threads = [threading.Thread(target=user, args=c, daemon=True) for c in clients]
+  for t in threads: t.start()
+  for t in threads: t.join()
+  return latencies, time.perf_counter() - start, errors[0], sql
+
+
+def run(job):
+  path, task = job
+  sqlstats.install()
+  with sandbox.workspace() as workdir:
+    try:
+      module, app = sandbox.load(path, workdir, main=True)
+    except (Exception, SystemExit) as e:
+      return {'error': f"{type(e).__name__}: {e}"[:300]}
+    if app is None:
+      return {'error': 'no Flask app'}
+    steps = [p for p, _ in prepare(app, scripts.workload(task)[1])]
+    if not steps:
+      return {'error': 'no workload route'}
+
+    levels = {}
+    try:
+      fixture = fixtures.Fixture(workdir)
+      with sandbox.deadline(LIMIT), contextlib.redirect_stdout(io.StringIO()), \
+          contextlib.redirect_stderr(io.StringIO()):
+        for users in LEVELS:
+          fixture.restore()
+          latencies, wall, errors, sql = level(app, task, users)
+          ms = np.percentile(latencies, [50, 95, 99]) * 1000 if latencies else [None] * 3
+          n = len(latencies) or 1
+          # SQL per request
+          levels[users] = {'requests': len(latencies), 'rps': len(latencies) / wall, 'errors': errors,
+                           'p50': ms[0], 'p95': ms[1], 'p99': ms[2],
+                           'statements': sql['statements'] / n, 'sql_ms': sql['seconds'] * 1000 / n,
+                           'connections': sql['connections'] / n, 'checkouts': sql['checkouts'] / n,
+                           'commits': sql['commits'] / n}
+    except (Exception, SystemExit) as e:
+      return {'error': f"{type(e).__name__}: {e}"[:300], 'routes': steps, 'levels': levels}
+    return {'error': '', 'routes': steps, 'levels': levels}
+
+
+def main(workers=None):
+  start = time.perf_counter()
+  args = sys.argv[1:]
+  task = None
+  if '--task' in args:
+    i = args.index('--task')
+    task = int(args[i + 1])
+    del args[i:i + 2]
+  conn = corpus.load()
+  rows = [r for r in corpus.files(conn, role='app') if r['task'] in scripts.WORKLOADS]
+  if args:
+    wanted = [os.path.relpath(os.path.abspath(p), corpus.ROOT).replace(os.sep, '/') for p in args]
+    known = {r['path'] for r in rows}
+    rows = [r for r in rows if r['path'] in wanted]
+    # files the manifest does not list run the workload of --task
+    for path in wanted:
+      if path in known: continue
+      if task not in scripts.WORKLOADS: sys.exit(f"{path} is not in the manifest, pass --task 1..9 for it")
+      with open(os.path.join(corpus.ROOT, path), 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+      rows.append({'path': path, 'label': os.path.basename(path), 'persona': '', 'reliability': 0, 'task': task,
+                   'run': 1, 'sha256': digest})
+
+  # one app at a time per core, otherwise they compete for the same CPU
+  with loader.pool(workers or os.cpu_count()) as pool:
+    results = pool.map(run, [(r['path'], r['task']) for r in rows])
+    out = {}
+    for r, result in zip(rows, results):
+      out[r['path']] = dict(label=r['label'], persona=r['persona'], reliability=r['reliability'], task=r['task'],
+                            run=r['run'], sha256=r['sha256'], **result)
+
+  path = os.path.join(HERE, 'benchmarks.json')
+  with open(path, 'w') as f:
+    json.dump(out, f, indent=1)
+  ok = {k: v for k, v in out.items() if not v['error']}
+  print(f"{len(ok)}/{len(out)} apps benchmarked in {time.perf_counter() - start:.2f}s -> {path}")
+
+  # median throughput per model and task with one simulated user
+  table = defaultdict(list)
+  for v in ok.values():
+    table[(v['label'], v['task'])].append(v['levels'][LEVELS[0]]['rps'])
+  labels = sorted({k[0] for k in table})
+  print(f"\n{'req/s':<28}" + "".join(f"{'task ' + str(t):>9}" for t in sorted(scripts.WORKLOADS)))
+  for label in labels:
+    cells = [table.get((label, t)) for t in sorted(scripts.WORKLOADS)]
+    print(f"{label:<28}" + "".join(f"{np.median(c):>9.0f}" if c else f"{'-':>9}" for c in cells))
+
+  # median SQL work per request with one simulated user: statements and
+  # connections opened (pool checkouts for the SQLAlchemy apps)
+  table = defaultdict(list)
+  for v in ok.values():
+    first = v['levels'][LEVELS[0]]
+    table[(v['label'], v['task'])].append((first['statements'], first['connections'] + first['checkouts']))
+  print(f"\n{'SQL / connections per req':<28}" + "".join(f"{'task ' + str(t):>9}" for t in sorted(scripts.WORKLOADS)))
+  for label in labels:
+    cells = [table.get((label, t)) for t in sorted(scripts.WORKLOADS)]
+    print(f"{label:<28}" + "".join(f"{np.median([c[0] for c in cell]):>5.1f}/{np.median([c[1] for c in cell]):<3.0f}"
+                                   if cell else f"{'-':>9}" for cell in cells))
+
+
+if __name__ == '__main__':
+  main()
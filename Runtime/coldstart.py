@@ -0,0 +1,145 @@
+import _ast
+import os
+import resource
+import sys
+import time
+
+# Child process of startup.py: runs one copied app in a fresh interpreter and
+# times its top-level statements, those of the `if __name__ == '__main__'`
+# block included, one at a time. Nothing but the modules above is loaded when
+# the app starts; the file is parsed with _ast, the C module under ast, since
+# Flask imports ast itself. The harness (sandbox.py, sqlstats.py, scripts.py,
+# and through them werkzeug, sqlite3, ...) is imported once the app's leading
+# imports have run, untimed, so none of the modules the app imports is in
+# sys.modules before its import is timed. Prints seconds, SQLite statements
+# and setup statements (CREATE, DROP, ALTER, INSERT) per statement as JSON;
+# startup.py sorts them into phases.
+#
+#   python coldstart.py <copied app> <task>
+
+
+def main_guard(node):
+  # if __name__ == '__main__':
+  if not isinstance(node, _ast.If) or not isinstance(node.test, _ast.Compare): return False
+  sides = [node.test.left] + node.test.comparators
+  return {(type(s).__name__, getattr(s, 'id', getattr(s, 'value', None))) for s in sides} == \
+         {('Name', '__name__'), ('Constant', '__main__')}
+
+
+def statements(source, filename):
+  # (node, code) of every top-level statement, the bodies of main guards
+  # flattened since the app runs as __main__
+  tree = compile(source, filename, 'exec', _ast.PyCF_ONLY_AST, dont_inherit=True)
+  flags = 0
+  out = []
+  for node in tree.body:
+    for n in node.body if main_guard(node) else [node]:
+      if isinstance(n, _ast.ImportFrom) and n.module == '__future__':
+        flags |= getattr(__import__('__future__'), n.names[0].name).compiler_flag
+      out.append((n, compile(_ast.Module([n], []), filename, 'exec', flags=flags, dont_inherit=True)))
+  return out
+
+
+def peak_rss():
+  # kilobytes on Linux
+  return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def execute(todo, module, timings, counted=None):
+  # [seconds, SQL statements, setup SQL statements] of each statement, until
+  # one raises; counted() gives the two SQL totals so far
+  for node, code in todo:
+    before = counted() if counted else (0, 0)
+    start = time.perf_counter()
+    try:
+      exec(code, module.__dict__)
+    finally:
+      seconds = time.perf_counter() - start
+      after = counted() if counted else (0, 0)
+      timings.append([seconds, after[0] - before[0], after[1] - before[1]])
+
+
+def profile(module_path, task):
+  # everything is relative to the start of the app
+  result = {'error': '', 'base_rss_kb': peak_rss(), 'timings': []}
+  with open(module_path, encoding='utf-8') as f:
+    source = f.read()
+  try:
+    todo = statements(source, module_path)
+  except SyntaxError as e:
+    return dict(result, error=f"SyntaxError: {e}"[:300])
+  leading = next((i for i, (n, _) in enumerate(todo) if not isinstance(n, (_ast.Import, _ast.ImportFrom))), len(todo))
+
+  # what sandbox.prepare() does, without importing sandbox
+  workdir = os.path.dirname(module_path)
+  module = type(sys)('__main__')
+  module.__file__ = module_path
+  sys.modules['__main__'] = module
+  sys.path.insert(0, workdir)
+  os.chdir(workdir)
+
+  sys.stdout = sys.stderr = open(os.devnull, 'w')
+  error = app = None
+  begin = time.perf_counter()
+  try:
+    execute(todo[:leading], module, result['timings'])
+  except (Exception, SystemExit) as e:
+    error = e
+
+  # the harness, left out of the startup time
+  pause = time.perf_counter()
+  import sandbox
+  import scripts
+  import sqlstats
+  sqlstats.install()
+  sandbox.stop_run()
+  begin += time.perf_counter() - pause
+
+  def counted():
+    totals = sqlstats.counters()
+    return totals['statements'], totals['setup']
+
+  if error is None:
+    try:
+      with sandbox.deadline():
+        execute(todo[leading:], module, result['timings'], counted)
+    except sandbox.Started as e:
+      app = e.app
+    except (Exception, SystemExit) as e:
+      error = e
+  if error is not None:
+    result['error'] = f"{type(error).__name__}: {error}"[:300]
+  result['startup'] = time.perf_counter() - begin
+  app = app or sandbox.find_app(module.__dict__)
+  if app is None and not result['error']:
+    result['error'] = 'no Flask app'
+
+  # the script of the task until the first answer below 400
+  if app is not None:
+    client = app.test_client()
+    tried = 0
+    for name, method, candidates, payload in scripts.SCRIPTS.get(task, []):
+      url = scripts.route(app, method, candidates)
+      if url is None: continue
+      tried += 1
+      try:
+        with sandbox.deadline():
+          status = client.open(url, **scripts.request(app, method, url, payload)).status_code
+      except (Exception, SystemExit):
+        continue
+      if status < 400:
+        result['first_request'] = {'step': name, 'status': status, 'tried': tried,
+                                   'seconds': time.perf_counter() - begin}
+        break
+  result['peak_rss_kb'] = peak_rss()
+  return result
+
+
+def main():
+  result = profile(sys.argv[1], int(sys.argv[2]))
+  import json
+  print(json.dumps(result), file=sys.__stdout__)
+
+
+if __name__ == '__main__':
+  main()
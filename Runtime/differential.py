@@ -0,0 +1,118 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+import loader
+import sandbox
+import scripts
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'consistency'))
+import corpus
+import score
+
+# Differential functional testing of the reliability pairs. Both apps of a
+# testNa.py / testNb.py pair are driven through app.test_client() with the
+# request script of their task (scripts.py), each in its own child of the
+# preloaded forkserver (loader.py) and its own sandbox (sandbox.py), without
+# sockets or a running server. Apps run as __main__ so their init_db() and
+# seeding happen. Every step records (status, JSON or body, redirect, database
+# rows added/removed) and the a and b traces are compared step by step.
+
+
+def body(response):
+  if response.is_json:
+    return {'json': response.get_json(silent=True)}
+  return {'text': response.get_data(as_text=True)[:200]}
+
+
+def trace(job):
+  path, task = job
+  with sandbox.workspace() as workdir:
+    try:
+      module, app = sandbox.load(path, workdir, main=True)
+    except (Exception, SystemExit) as e:
+      return {'error': f"{type(e).__name__}: {e}"[:300], 'steps': []}
+    if app is None:
+      return {'error': 'no Flask app', 'steps': []}
+
+    client = app.test_client()
+    before = sandbox.snapshot(workdir)
+    steps = []
+    for name, method, candidates, payload in scripts.SCRIPTS[task]:
+      step = {'step': name, 'method': method, 'path': scripts.route(app, method, candidates), 'status': None}
+      if step['path'] is not None:
+        try:
+          with sandbox.deadline(), contextlib.redirect_stdout(io.StringIO()), \
+              contextlib.redirect_stderr(io.StringIO()):
+            response = client.open(step['path'], **scripts.request(app, method, step['path'], payload))
+          step.update(status=response.status_code, location=response.headers.get('Location'), **body(response))
+        except Exception as e:
+          step['error'] = f"{type(e).__name__}: {e}"[:300]
+      after = sandbox.snapshot(workdir)
+      step['db'] = sandbox.diff(before, after)
+      before = after
+      steps.append(step)
+    return {'error': '', 'steps': steps}
+
+
+def outcome(step):
+  # what has to match between a and b: status, the shape of the JSON answer
+  # (or that it was not JSON), whether it redirected, and how many rows changed
+  if 'json' in step:
+    value = step['json']
+    shape = sorted(value) if isinstance(value, dict) else type(value).__name__
+  else:
+    shape = 'text' if step['status'] is not None else None
+  changes = [sum(c[0] for c in step['db'].values()), sum(c[1] for c in step['db'].values())]
+  return [step['status'], shape, bool(step.get('location')), changes]
+
+
+def compare(a, b):
+  # (steps that match, index of the first step that does not, or None)
+  same = [outcome(x) == outcome(y) for x, y in zip(a['steps'], b['steps'])]
+  first = same.index(False) if False in same else None
+  return sum(same), first
+
+
+def main(workers=None):
+  start = time.perf_counter()
+  todo = [(a, b) for a, b in score.pairs(corpus.load()) if a['task'] in scripts.SCRIPTS]
+  jobs = sorted({(r['path'], r['task']) for pair in todo for r in pair})
+  with loader.pool(workers) as pool:
+    traces = dict(zip((path for path, _ in jobs), pool.map(trace, jobs)))
+
+  with open(os.path.join(HERE, 'traces.json'), 'w') as f:
+    json.dump(traces, f, indent=1, default=repr)
+
+  rows = []
+  for a, b in todo:
+    ta, tb = traces[a['path']], traces[b['path']]
+    same, first = compare(ta, tb)
+    rows.append({'label': a['label'], 'persona': a['persona'], 'task': a['task'], 'run': a['run'],
+                 'path_a': a['path'], 'path_b': b['path'], 'steps': len(scripts.SCRIPTS[a['task']]),
+                 'same': same, 'first_difference': '' if first is None else ta['steps'][first]['step'],
+                 'error_a': ta['error'], 'error_b': tb['error']})
+  out = os.path.join(HERE, 'differential.csv')
+  with open(out, 'w', newline='') as f:
+    writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+  print(f"{len(jobs)} apps, {len(rows)} pairs in {time.perf_counter() - start:.2f}s -> {out}")
+
+  # share of pairs whose traces agree on every step
+  agree = defaultdict(list)
+  for r in rows:
+    if not r['error_a'] and not r['error_b']:
+      agree[(r['label'], r['persona'])].append(r['same'] == r['steps'])
+  for (label, persona), same in sorted(agree.items()):
+    print(f"  {label:<28} {persona:<9} {sum(same)}/{len(same)} identical")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+import loader
+import sandbox
+
+# Seeded databases of a loaded app, restored before every test case instead
+# of rebuilding them. Most apps reset their state with DROP TABLE IF EXISTS,
+# CREATE TABLE and seed inserts in init_db(), each statement committed on its
+# own; once the app has been loaded (sandbox.load with main=True) its SQLite
+# files are in the seeded state, Fixture copies each into an in-memory
+# database with the backup API, and restore() copies them back over the live
+# files, which the app's own connections and SQLAlchemy pools see on their next
+# query. The fixture keeps one connection per file with synchronous = OFF
+# open, so a restore is a page copy without fsync, skipped while PRAGMA
+# data_version shows no other connection wrote to the file. Databases the
+# app only creates later, and :memory: ones, are not covered.
+#
+#   python fixtures.py [file ...]    time loading, snapshots and restores
+
+RESTORES = 100  # restores timed per app, each copying every file
+
+
+def version(conn):
+  # changes whenever another connection commits to the file
+  return conn.execute('PRAGMA data_version').fetchone()[0]
+
+
+class Fixture:
+  def __init__(self, workdir):
+    # (path, in-memory copy, connection to the file)
+    self.databases = []
+    for path in sandbox.databases(workdir):
+      # sqlite3.Connection directly: the fixture's own connections are not
+      # counted by sqlstats.install()
+      target = sqlite3.Connection(path, check_same_thread=False)
+      target.execute('PRAGMA synchronous = OFF')
+      copy = sqlite3.Connection(':memory:', check_same_thread=False)
+      target.backup(copy)
+      self.databases.append((path, copy, target))
+    self.versions = [version(target) for path, copy, target in self.databases]
+
+  def restore(self, force=False):
+    # files nobody wrote to since the last restore are left alone
+    for i, (path, copy, target) in enumerate(self.databases):
+      if not force and version(target) == self.versions[i]: continue
+      copy.backup(target)
+      self.versions[i] = version(target)
+
+  def close(self):
+    for path, copy, target in self.databases:
+      copy.close()
+      target.close()
+    self.databases = []
+
+
+def timed(path):
+  # (seconds to load, to snapshot, per restore, databases), None if the app
+  # does not load
+  with sandbox.workspace() as workdir:
+    start = time.perf_counter()
+    try:
+      module, app = sandbox.load(path, workdir, main=True)
+    except (Exception, SystemExit):
+      return None
+    loaded = time.perf_counter()
+    try:
+      fixture = Fixture(workdir)
+      snapshot = time.perf_counter()
+      for _ in range(RESTORES): fixture.restore(force=True)
+    except sqlite3.Error:
+      return None
+    done = time.perf_counter()
+    files = len(fixture.databases)
+    fixture.close()
+    return loaded - start, snapshot - loaded, (done - snapshot) / RESTORES, files
+
+
+def main(workers=None):
+  sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Complexity'))
+  import corpus
+  rows = corpus.files(corpus.load(), role='app')
+  if len(sys.argv) > 1:
+    wanted = {os.path.relpath(os.path.abspath(p), corpus.ROOT).replace(os.sep, '/') for p in sys.argv[1:]}
+    rows = [r for r in rows if r['path'] in wanted]
+
+  start = time.perf_counter()
+  with loader.pool(workers) as pool:
+    results = list(pool.map(timed, [r['path'] for r in rows]))
+  table = defaultdict(list)
+  for r, result in zip(rows, results):
+    if result and result[3]: table[r['label']].append(result)
+  print(f"{sum(map(len, table.values()))}/{len(rows)} apps with SQLite files in {time.perf_counter() - start:.2f}s\n")
+
+  # medians: loading with init_db() and seeding vs restoring the seeded files
+  print(f"{'median':<28}{'load ms':>10}{'snapshot ms':>13}{'restore us':>12}{'files':>7}")
+  for label, cells in sorted(table.items()):
+    load, snapshot, restore, files = (statistics.median(c) for c in zip(*cells))
+    print(f"{label:<28}{load * 1000:>10.1f}{snapshot * 1000:>13.2f}{restore * 1e6:>12.0f}{files:>7.0f}")
+
+
+if __name__ == '__main__':
+  main()
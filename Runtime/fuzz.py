@@ -0,0 +1,346 @@
+import ast
+import contextlib
+import inspect
+import io
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import time
+import traceback
+import urllib.parse
+from collections import Counter, defaultdict
+
+import loader
+import fixtures
+import routecov
+import sandbox
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'Complexity'))
+import corpus
+
+# Property-based fuzzing of every endpoint of every app. The routes come from
+# app.url_map and the fields each view reads from its source (request.form[...],
+# request.args.get(...), data.get(...) after data = request.get_json(), headers,
+# cookies); inputs are drawn from a seeded generator of awkward values (wrong
+# types, empty and huge strings, SQL and HTML fragments, non-object JSON,
+# malformed JSON) and sent through app.test_client() with exceptions
+# propagated, one forkserver child per app (loader.py) and BUDGET seconds
+# each. An exception raised while the app handles a request is a crash;
+# crashes are deduplicated by exception type and the app frames of the
+# traceback, and the first input of each is shrunk field by field while it
+# still crashes the same way. Every input runs against the seeded databases
+# of the app, restored by fixtures.py, so neither crashes nor shrinking depend
+# on what earlier inputs wrote. The smallest input seen for every outcome
+# (status code or crash) of an endpoint is kept as the corpus in fuzz.json and
+# replayed first on the next run of an unchanged file.
+#
+#   python fuzz.py [file ...]
+
+BUDGET = 3.0      # seconds of fuzzing per app
+SHRINK = 100      # attempts at shrinking one crash
+SEED = 20250331
+BODY = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+# request attribute -> part of the input it reads
+READERS = {'form': 'form', 'args': 'args', 'values': 'args', 'json': 'json', 'headers': 'headers',
+           'cookies': 'cookies'}
+STRINGS = ['', ' ', 'a', '0', '-1', '1.5', '1e309', 'NaN', 'null', 'true', "' OR '1'='1", '"; DROP TABLE users; --',
+           '<script>alert(1)</script>', '../../etc/passwd', '%s%n', '\x00', 'é', '日本', '\U0001F600', '!!!', '====',
+           'a' * 5000]
+NUMBERS = [0, 1, -1, 2 ** 31, -2 ** 31, 2 ** 63, -2 ** 63, 10 ** 30, 0.5, -0.5, 1e308]
+RAW = ['', '{', '{"a": }', 'null', '[]', '"text"', '12', 'true', '[{}]']
+ARGUMENT = re.compile(r'<(?:([^:<>]+):)?([^<>]+)>')
+DROP = object()  # shrinking step that removes a field
+
+
+def reads(node):
+  # part of the request node is, None if it is not one
+  if isinstance(node, ast.BoolOp):
+    return next(filter(None, map(reads, node.values)), None)
+  if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+    if node.func.attr == 'get_json': return 'json'
+    if node.func.attr in ('to_dict', 'copy'): return reads(node.func.value)
+  if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == 'request':
+    return READERS.get(node.attr)
+  return None
+
+
+def fields(node):
+  # part -> field names the function reads, directly or through a variable
+  aliases = {}
+  for n in ast.walk(node):
+    if isinstance(n, ast.Assign) and len(n.targets) == 1 and isinstance(n.targets[0], ast.Name) and reads(n.value):
+      aliases[n.targets[0].id] = reads(n.value)
+  out = defaultdict(set)
+  for n in ast.walk(node):
+    if isinstance(n, ast.Subscript):
+      base, key = n.value, n.slice
+    elif isinstance(n, ast.Call) and isinstance(n.func, ast.Attribute) and n.func.attr in ('get', 'getlist', 'pop') \
+        and n.args:
+      base, key = n.func.value, n.args[0]
+    elif isinstance(n, ast.Compare) and len(n.ops) == 1 and isinstance(n.ops[0], (ast.In, ast.NotIn)):
+      base, key = n.comparators[0], n.left
+    else:
+      continue
+    if not isinstance(key, ast.Constant) or not isinstance(key.value, str): continue
+    part = reads(base) or (aliases.get(base.id) if isinstance(base, ast.Name) else None)
+    if part: out[part].add(key.value)
+  return {part: sorted(names) for part, names in out.items()}
+
+
+def targets(app, tree):
+  # (method, rule, fields) of every endpoint the app defines itself
+  out = []
+  for rule in app.url_map.iter_rules():
+    if rule.endpoint in routecov.NO_ROUTES: continue
+    view = app.view_functions.get(rule.endpoint)
+    # the function under every functools.wraps decorator, as in routecov.py
+    code = getattr(inspect.unwrap(view), '__code__', None) if view else None
+    node = routecov.function_node(tree, code) if code else None
+    found = fields(node) if node else {}
+    for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+      out.append((method, rule.rule, found))
+  return out
+
+
+def value(rng):
+  kind = rng.random()
+  if kind < 0.3: return rng.choice(STRINGS)
+  if kind < 0.5: return rng.choice(NUMBERS)
+  if kind < 0.6: return rng.randint(-10 ** 6, 10 ** 6)
+  if kind < 0.7: return ''.join(rng.choice('azAZ09 _-.@/%\'"<>') for _ in range(rng.randint(1, 40)))
+  if kind < 0.8: return rng.choice([None, True, False])
+  if kind < 0.9: return [value(rng) for _ in range(rng.randint(0, 3))]
+  return {rng.choice(['a', 'id', 'name']): value(rng) for _ in range(rng.randint(0, 2))}
+
+
+def text(v):
+  # form, query, header and cookie values are strings
+  if isinstance(v, str): return v
+  return '' if v is None else json.dumps(v)
+
+
+def generate(rng, target):
+  # one input: path arguments, then the parts the view reads; fields are left
+  # out now and then, JSON bodies are sometimes not objects or not JSON
+  method, rule, found = target
+  case = {}
+  for converter, name in ARGUMENT.findall(rule):
+    if converter in ('int', 'float'):
+      case.setdefault('path', {})[name] = rng.choice([0, 1, 2, 99999, 2 ** 63])
+    else:
+      case.setdefault('path', {})[name] = text(rng.choice([rng.choice(STRINGS), value(rng)])) or 'x'
+  for part in ('args', 'form', 'headers', 'cookies'):
+    if found.get(part):
+      case[part] = {f: text(value(rng)) for f in found[part] if rng.random() < 0.85}
+  if found.get('json') or (method in BODY and 'form' not in found):
+    roll = rng.random()
+    if roll < 0.1:
+      case['raw'] = rng.choice(RAW)
+    else:
+      names = found.get('json') or [rng.choice(['a', 'id', 'name'])]
+      case['json'] = {f: value(rng) for f in names if rng.random() < 0.85}
+  return case
+
+
+def request(target, case):
+  # (url, test_client kwargs)
+  method, rule, found = target
+  path = ARGUMENT.sub(lambda m: urllib.parse.quote(str(case['path'][m.group(2)]), safe=''), rule)
+  kwargs = {'method': method, 'query_string': case.get('args', {})}
+  headers = {k: re.sub(r'[\r\n\x00]', '', v).encode('latin-1', 'replace').decode('latin-1')
+             for k, v in case.get('headers', {}).items()}
+  kwargs['headers'] = headers
+  if 'json' in case:
+    kwargs['json'] = case['json']
+  elif 'raw' in case:
+    kwargs.update(data=case['raw'], content_type='application/json')
+  elif 'form' in case:
+    kwargs['data'] = case['form']
+  return path, kwargs
+
+
+def signature(error, filename):
+  # exception type and the app frames it went through, or the innermost
+  # frame when the app has none (a view returning None, ...)
+  frames = traceback.extract_tb(error.__traceback__)
+  own = [f"{f.name}:{f.lineno}" for f in frames if f.filename == filename]
+  if not own: own = [f"{os.path.basename(frames[-1].filename)}:{frames[-1].name}"]
+  return f"{type(error).__name__} at {' > '.join(own)}"
+
+
+def attempt(app, filename, target, case, fixture=None):
+  # (status, None) or (None, crash signature); exceptions raised before the
+  # app got the request (an unencodable header, a database that could not be
+  # restored, ...) are no crash
+  try:
+    if fixture: fixture.restore()
+    path, kwargs = request(target, case)
+    with sandbox.deadline():
+      return app.test_client().open(path, **kwargs).status_code, None
+  except sandbox.Timeout:
+    return None, 'Timeout'
+  except (Exception, SystemExit) as e:
+    if not any(f.name == 'wsgi_app' for f in traceback.extract_tb(e.__traceback__)): return -1, None
+    return None, signature(e, filename)
+
+
+def size(case):
+  return len(json.dumps(case, default=str))
+
+
+def simpler(v):
+  # smaller values to try in place of v, simplest first
+  if isinstance(v, dict):
+    yield {}
+    for k in v: yield {x: y for x, y in v.items() if x != k}
+  elif isinstance(v, list):
+    yield []
+    if len(v) > 1: yield v[:len(v) // 2]
+  elif isinstance(v, str):
+    for s in ('', 'a', '0', v[:len(v) // 2]):
+      if len(s) < len(v): yield s
+  elif isinstance(v, bool) or v is None:
+    return
+  elif isinstance(v, (int, float)):
+    for n in (0, 1, int(v / 2)):
+      if abs(n) < abs(v): yield n
+
+
+def shrink(app, filename, target, case, crash, fixture=None):
+  # greedy: drop fields, then simplify values, while the same crash happens
+  tries = 0
+
+  def still(candidate):
+    nonlocal tries
+    tries += 1
+    return attempt(app, filename, target, candidate, fixture)[1] == crash
+
+  progress = True
+  while progress and tries < SHRINK:
+    progress = False
+    for part in [p for p in case if p != 'path']:
+      keys = list(case[part]) if isinstance(case[part], dict) else [None]
+      for key in keys:
+        current = case[part] if key is None else case[part][key]
+        options = list(simpler(current))
+        if key is not None: options.insert(0, DROP)
+        for option in options:
+          if tries >= SHRINK: break
+          candidate = json.loads(json.dumps(case))
+          if key is None:
+            candidate[part] = option
+          elif option is DROP:
+            del candidate[part][key]
+          else:
+            candidate[part][key] = option
+          if size(candidate) < size(case) and still(candidate):
+            case, progress = candidate, True
+            break
+  return case
+
+
+def fuzz(job):
+  path, seed, replay = job
+  with sandbox.workspace() as workdir:
+    try:
+      module, app = sandbox.load(path, workdir, main=True)
+    except (Exception, SystemExit) as e:
+      return {'error': f"{type(e).__name__}: {e}"[:300]}
+    if app is None:
+      return {'error': 'no Flask app'}
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    filename = module.__file__
+    try:
+      fixture = fixtures.Fixture(workdir)
+    except sqlite3.Error:
+      fixture = None
+    with open(filename, encoding='utf-8') as f:
+      endpoints = targets(app, ast.parse(f.read()))
+    if not endpoints:
+      return {'error': 'no routes'}
+
+    rng = random.Random(f"{seed}:{path}")
+    crashes, kept = {}, defaultdict(dict)
+    examples = 0
+
+    def run(target, case):
+      nonlocal examples
+      examples += 1
+      status, crash = attempt(app, filename, target, case, fixture)
+      key = f"{target[0]} {target[1]}"
+      outcome = crash or str(status)
+      if crash and crash not in crashes and crash != 'Timeout':
+        case = shrink(app, filename, target, case, crash, fixture)
+      if crash:
+        entry = crashes.setdefault(crash, {'signature': crash, 'route': key, 'count': 0, 'input': case})
+        entry['count'] += 1
+      if outcome not in kept[key] or size(case) < size(kept[key][outcome]):
+        kept[key][outcome] = case
+
+    stop = time.perf_counter() + BUDGET
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+      by_key = {f"{t[0]} {t[1]}": t for t in endpoints}
+      for key, cases in replay.items():
+        for case in cases:
+          if key in by_key: run(by_key[key], case)
+      while time.perf_counter() < stop:
+        for target in endpoints:
+          run(target, generate(rng, target))
+    isolated = fixture is not None
+    if fixture: fixture.close()
+    return {'error': '', 'endpoints': len(endpoints), 'examples': examples, 'isolated': isolated,
+            'crashes': sorted(crashes.values(), key=lambda c: (c['route'], c['signature'])),
+            'corpus': {key: list(outcomes.values()) for key, outcomes in kept.items()}}
+
+
+def main(workers=None):
+  start = time.perf_counter()
+  rows = corpus.files(corpus.load(), role='app')
+  if len(sys.argv) > 1:
+    wanted = {os.path.relpath(os.path.abspath(p), corpus.ROOT).replace(os.sep, '/') for p in sys.argv[1:]}
+    rows = [r for r in rows if r['path'] in wanted]
+
+  out_path = os.path.join(HERE, 'fuzz.json')
+  previous = {}
+  if os.path.exists(out_path):
+    with open(out_path) as f:
+      previous = json.load(f)
+  # the corpus of the last run is replayed when the file did not change
+  jobs = [(r['path'], SEED, previous.get(r['path'], {}).get('corpus', {})
+           if previous.get(r['path'], {}).get('sha256') == r['sha256'] else {}) for r in rows]
+
+  with loader.pool(workers or os.cpu_count()) as pool:
+    out = {}
+    for r, result in zip(rows, pool.map(fuzz, jobs)):
+      out[r['path']] = dict(label=r['label'], persona=r['persona'], task=r['task'], run=r['run'],
+                            sha256=r['sha256'], **result)
+  if len(sys.argv) > 1: out = dict(previous, **out)
+
+  with open(out_path, 'w') as f:
+    json.dump(out, f, indent=1, default=str)
+  fuzzed = [v for p, v in out.items() if p in {r['path'] for r in rows} and not v['error']]
+  print(f"{len(fuzzed)}/{len(rows)} apps, {sum(v['examples'] for v in fuzzed)} requests in "
+        f"{time.perf_counter() - start:.2f}s -> {out_path}")
+
+  # apps with at least one crash and distinct crashes per model and persona
+  table = defaultdict(lambda: [0, 0, 0])
+  kinds = Counter()
+  for v in fuzzed:
+    cell = table[(v['label'], v['persona'])]
+    cell[0] += 1
+    cell[1] += bool(v['crashes'])
+    cell[2] += len(v['crashes'])
+    kinds.update(c['signature'].split(' ')[0] for c in v['crashes'])
+  print(f"\n{'':<38}{'apps':>6}{'crashing':>10}{'crashes':>9}")
+  for (label, persona), (apps, crashing, crashes) in sorted(table.items()):
+    print(f"{label + ' (' + persona + ')':<38}{apps:>6}{crashing:>10}{crashes:>9}")
+  print("\n" + ", ".join(f"{kind} {n}" for kind, n in kinds.most_common(8)))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import sandbox
+
+# Worker pool for tools that import the generated apps. A forkserver process
+# imports Flask, Werkzeug, Jinja2, SQLAlchemy, cryptography, wtforms, ... once;
+# every job then runs in a fresh child forked from it, so each app is loaded
+# in isolation (module state, monkeypatching, init_db() side effects die with
+# the child) without paying those imports again.
+#
+#   python loader.py [n]    time loading n apps with and without preloading
+
+# imported once in the forkserver; missing ones are skipped
+PRELOAD = [
+  'flask', 'flask.json', 'werkzeug', 'werkzeug.security', 'jinja2', 'itsdangerous', 'click',
+  'sqlalchemy', 'sqlalchemy.orm', 'sqlalchemy.dialects.sqlite', 'flask_sqlalchemy',
+  'wtforms', 'flask_wtf', 'flask_login', 'flask_bcrypt', 'flask_limiter', 'flask_cors',
+  'bcrypt', 'jwt', 'cryptography.fernet', 'cryptography.hazmat.primitives.ciphers',
+  'cryptography.hazmat.primitives.kdf.pbkdf2', 'cryptography.hazmat.backends',
+  'sqlite3', 'hashlib', 'hmac', 'secrets', 'json', 'datetime', 'uuid', 're', 'logging',
+  'sandbox', 'scripts', 'sqlstats', 'fixtures',
+]
+
+
+def context():
+  ctx = multiprocessing.get_context('forkserver')
+  ctx.set_forkserver_preload(PRELOAD)
+  return ctx
+
+
+def pool(workers=None):
+  # one fresh child per job, forked from the preloaded server
+  return ProcessPoolExecutor(max_workers=workers, mp_context=context(), max_tasks_per_child=1)
+
+
+def timed_load(path):
+  # seconds spent loading one app in the child, None if it does not load
+  with sandbox.workspace() as workdir:
+    start = time.perf_counter()
+    try:
+      module, app = sandbox.load(path, workdir)
+    except (Exception, SystemExit):
+      return None
+    return time.perf_counter() - start if app is not None else None
+
+
+def measure(paths, executor):
+  start = time.perf_counter()
+  with executor:
+    times = [t for t in executor.map(timed_load, paths) if t is not None]
+  return time.perf_counter() - start, times
+
+
+def main():
+  sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Complexity'))
+  import corpus
+  n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+  paths = corpus.paths(role='app', reliability=1)[:n]
+  paths = [os.path.relpath(p, corpus.ROOT) for p in paths]
+
+  spawn = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'), max_tasks_per_child=1)
+  for name, executor in (('spawn', spawn), ('forkserver', pool())):
+    wall, times = measure(paths, executor)
+    print(f"{name:<11} {len(paths)} modules in {wall:.2f}s, {len(times)} apps loaded, "
+          f"{1000 * sum(times) / max(len(times), 1):.1f} ms per load in the child")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,426 @@
+import ast
+import base64
+import contextlib
+import inspect
+import io
+import json
+import os
+import re
+import runpy
+import sys
+import time
+import types
+import unittest
+import urllib.parse
+from collections import defaultdict
+
+import loader
+import sandbox
+import scripts
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'Complexity'))
+import corpus
+
+# Route-level line and branch coverage of the generated apps. Every app is
+# driven once by the request script of its task (scripts.py) and once by each
+# helper script next to it that exercises it (security_task3run2_unit_tests.py,
+# task3unittest2, test3ascript.py, ...), each run in its own forkserver child
+# (loader.py). The helpers talk to localhost:5000 through `requests`; in the
+# child that module is replaced by one that sends the same calls to the app's
+# test_client, so no server or socket is involved. On Python 3.12+ lines and
+# branches are recorded with sys.monitoring, with events enabled only on the
+# code objects of the app and every line event disabled after its first hit,
+# so the rest of the interpreter runs unobserved. Older interpreters fall
+# back to sys.settrace, which only traces frames of the app file but still
+# sees every call. Executed lines and branch outcomes are then attributed to
+# the routes of app.url_map. Results are written per app to routecov.json.
+#
+#   python routecov.py [file ...]
+
+LIMIT = 60  # seconds for one driver
+MONITORING = hasattr(sys, 'monitoring')
+# helper scripts that drive an app: over HTTP, as unit tests or through a test client
+DRIVES = re.compile(r'\brequests\b|\bunittest\b|\bpytest\b|test_client')
+NO_ROUTES = {'static'}
+
+
+def codes(code):
+  # code and every code object nested in it
+  yield code
+  for const in code.co_consts:
+    if isinstance(const, types.CodeType): yield from codes(const)
+
+
+class Collector:
+  # lines and arcs (line, next line; 0 = returned) executed in instrumented code
+
+  def __init__(self):
+    self.files, self.lines, self.arcs = set(), set(), set()
+    self.offsets = {}
+
+  def instrument(self, code):
+    self.files.add(code.co_filename)
+    if MONITORING:
+      self.monitor(code)
+    else:
+      sys.settrace(self.call)
+
+  def reset(self):
+    # forget what ran so far, e.g. while the app was loading
+    self.lines.clear()
+    self.arcs.clear()
+    if MONITORING: sys.monitoring.restart_events()
+
+  # sys.monitoring (Python 3.12+)
+
+  def monitor(self, code):
+    mon = sys.monitoring
+    events = mon.events
+    # 3.14 reports the two directions of a branch as separate events
+    self.split = hasattr(events, 'BRANCH_LEFT')
+    branches = [events.BRANCH_LEFT, events.BRANCH_RIGHT] if self.split else [events.BRANCH]
+    if mon.get_tool(mon.COVERAGE_ID) is None:
+      mon.use_tool_id(mon.COVERAGE_ID, 'routecov')
+      mon.register_callback(mon.COVERAGE_ID, events.LINE, self.on_line)
+      for event in branches:
+        mon.register_callback(mon.COVERAGE_ID, event, self.on_branch)
+    mask = events.LINE
+    for event in branches: mask |= event
+    for c in codes(code):
+      mon.set_local_events(mon.COVERAGE_ID, c, mask)
+
+  def on_line(self, code, line):
+    self.lines.add(line)
+    return sys.monitoring.DISABLE
+
+  def on_branch(self, code, source, destination):
+    self.arcs.add((self.line_at(code, source), self.line_at(code, destination)))
+    if self.split: return sys.monitoring.DISABLE
+
+  def line_at(self, code, offset):
+    table = self.offsets.get(code)
+    if table is None:
+      table = self.offsets[code] = {}
+      for start, end, line in code.co_lines():
+        for o in range(start, end, 2): table[o] = line or 0
+    return table.get(offset, 0)
+
+  # sys.settrace fallback
+
+  def call(self, frame, event, arg):
+    if frame.f_code.co_filename not in self.files: return None
+    previous = [None]
+
+    def local(frame, event, arg):
+      if event == 'line':
+        self.lines.add(frame.f_lineno)
+        if previous[0] is not None: self.arcs.add((previous[0], frame.f_lineno))
+        previous[0] = frame.f_lineno
+      elif event == 'return' and previous[0] is not None:
+        self.arcs.add((previous[0], 0))
+      return local
+
+    return local
+
+
+def executable(code):
+  # lines with bytecode in a function and the functions nested in it, the
+  # def (or first decorator) line of each left out
+  lines = set()
+  for c in codes(code):
+    lines |= {line for _, _, line in c.co_lines() if line and line != c.co_firstlineno}
+  return lines
+
+
+def function_node(tree, code):
+  for node in ast.walk(tree):
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == code.co_name:
+      if code.co_firstlineno in [node.lineno] + [d.lineno for d in node.decorator_list]: return node
+  return None
+
+
+def branches(node, arcs):
+  # (outcomes taken, outcomes) of the if/while/for statements in a function;
+  # an outcome is taken when an arc leaves the test for the body, or for the
+  # else branch / whatever follows
+  taken = total = 0
+  for n in ast.walk(node):
+    if not isinstance(n, (ast.If, ast.While, ast.For, ast.AsyncFor)): continue
+    test = n.iter if isinstance(n, (ast.For, ast.AsyncFor)) else n.test
+    tests = range(n.lineno, test.end_lineno + 1)
+    body = n.body[0].lineno
+    if body in tests: continue  # one-line `if x: return y`, not told apart by lines
+    exits = {b for a, b in arcs if a in tests and b not in tests}
+    other = n.orelse[0].lineno if n.orelse else None
+    taken += (body in exits) + (other in exits if other else bool(exits - {body}))
+    total += 2
+  return taken, total
+
+
+def routes(app, filename, tree, collector):
+  # "METHODS /rule" -> coverage of the view function serving it
+  out = {}
+  for rule in app.url_map.iter_rules():
+    if rule.endpoint in NO_ROUTES: continue
+    view = app.view_functions.get(rule.endpoint)
+    code = getattr(inspect.unwrap(view), '__code__', None) if view else None
+    if code is None or code.co_filename != filename: continue
+    lines = executable(code)
+    node = function_node(tree, code)
+    taken, total = branches(node, collector.arcs) if node else (0, 0)
+    methods = ','.join(sorted(rule.methods - {'HEAD', 'OPTIONS'}))
+    out[f"{methods} {rule.rule}"] = {'function': code.co_name, 'lines': [len(lines & collector.lines), len(lines)],
+                                     'branches': [taken, total]}
+  return out
+
+
+# `requests` for the helper scripts, answered by the app's test client
+
+class RequestException(OSError):
+  pass
+
+
+class HTTPError(RequestException):
+  pass
+
+
+class Response:
+  def __init__(self, response, url):
+    self.status_code = response.status_code
+    self.reason = response.status
+    self.headers = dict(response.headers)
+    self.content = response.get_data()
+    self.text = response.get_data(as_text=True)
+    self.url = url
+    self.ok = self.status_code < 400
+    self.history = []
+
+  def json(self, **kwargs):
+    return json.loads(self.text, **kwargs)
+
+  def raise_for_status(self):
+    if not self.ok: raise HTTPError(f"{self.status_code} {self.reason} for url: {self.url}")
+
+
+class Session:
+  app = None  # set on the subclass made for each app
+
+  def __init__(self):
+    self.client = self.app.test_client()
+    self.headers, self.cookies = {}, {}
+    self.verify, self.auth = True, None
+
+  def request(self, method, url, params=None, data=None, json=None, headers=None, cookies=None, auth=None,
+              allow_redirects=True, **ignored):
+    parts = urllib.parse.urlsplit(url)
+    headers = dict(self.headers, **(headers or {}))
+    auth = auth or self.auth
+    if isinstance(auth, tuple):
+      headers['Authorization'] = 'Basic ' + base64.b64encode(':'.join(auth).encode()).decode()
+    for key, value in dict(self.cookies, **(cookies or {})).items():
+      self.client.set_cookie(key, value)
+    kwargs = {'method': method.upper(), 'headers': headers, 'query_string': params or parts.query}
+    if data is not None: kwargs['data'] = data
+    if json is not None: kwargs['json'] = json
+    response = self.client.open(parts.path or '/', follow_redirects=allow_redirects, **kwargs)
+    return Response(response, url)
+
+  def get(self, url, params=None, **kwargs):
+    return self.request('GET', url, params=params, **kwargs)
+
+  def post(self, url, data=None, json=None, **kwargs):
+    return self.request('POST', url, data=data, json=json, **kwargs)
+
+  def put(self, url, data=None, **kwargs):
+    return self.request('PUT', url, data=data, **kwargs)
+
+  def patch(self, url, data=None, **kwargs):
+    return self.request('PATCH', url, data=data, **kwargs)
+
+  def delete(self, url, **kwargs):
+    return self.request('DELETE', url, **kwargs)
+
+  def head(self, url, **kwargs):
+    return self.request('HEAD', url, **dict({'allow_redirects': False}, **kwargs))
+
+  def close(self):
+    pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+
+def requests_module(app):
+  module = types.ModuleType('requests')
+  module.Session = module.session = type('Session', (Session,), {'app': app})
+  for method in ('request', 'get', 'post', 'put', 'patch', 'delete', 'head'):
+    # like requests, every top-level call starts without cookies
+    setattr(module, method, lambda *args, _method=method, **kwargs: getattr(module.Session(), _method)(*args, **kwargs))
+  module.exceptions = types.ModuleType('requests.exceptions')
+  for name, error in (('RequestException', RequestException), ('HTTPError', HTTPError),
+                      ('ConnectionError', RequestException), ('Timeout', RequestException),
+                      ('JSONDecodeError', ValueError)):
+    setattr(module, name, error)
+    setattr(module.exceptions, name, error)
+  module.Response = Response
+  module.packages = types.SimpleNamespace(urllib3=types.SimpleNamespace(disable_warnings=lambda *args: None))
+  return module
+
+
+def drive_script(app, task):
+  client = app.test_client()
+  for name, method, candidates, payload in scripts.SCRIPTS.get(task, []):
+    path = scripts.route(app, method, candidates)
+    if path is None: continue
+    try:
+      client.open(path, **scripts.request(app, method, path, payload))
+    except Exception:
+      continue
+
+
+def drive_helper(app, module, workdir, helper):
+  # run the copy of the helper with `requests` answered by app; it imports the
+  # app under its file name and gets the instance that is already loaded
+  path = os.path.join(workdir, os.path.basename(helper))
+  with open(path, encoding='utf-8') as f:
+    source = f.read()
+  requests = requests_module(app)
+  sys.modules.update({'requests': requests, 'requests.exceptions': requests.exceptions,
+                      os.path.splitext(os.path.basename(module.__file__))[0]: module})
+  sys.argv = [path]
+  if re.search(r'^\s*(import|from)\s+pytest\b', source, re.M) and path.endswith('.py'):
+    import pytest
+    pytest.main([path, '-q', '-p', 'no:cacheprovider', '--rootdir', workdir])
+    return
+  try:
+    namespace = runpy.run_path(path, run_name='__main__')
+  except SystemExit:
+    return
+  # TestCase classes nobody ran because there is no unittest.main()
+  cases = [v for v in namespace.values() if isinstance(v, type) and issubclass(v, unittest.TestCase)]
+  if cases and '__main__' not in source:
+    suite = unittest.TestSuite(unittest.defaultTestLoader.loadTestsFromTestCase(c) for c in cases)
+    unittest.TextTestRunner(stream=io.StringIO()).run(suite)
+
+
+def cover(job):
+  path, task, helper = job
+  collector = Collector()
+  with sandbox.workspace() as workdir:
+    try:
+      module, app = sandbox.load(path, workdir, main=True, instrument=collector.instrument)
+    except (Exception, SystemExit) as e:
+      return {'error': f"{type(e).__name__}: {e}"[:300]}
+    if app is None:
+      return {'error': 'no Flask app'}
+
+    collector.reset()
+    error = ''
+    try:
+      with sandbox.deadline(LIMIT), contextlib.redirect_stdout(io.StringIO()), \
+          contextlib.redirect_stderr(io.StringIO()):
+        if helper:
+          drive_helper(app, module, workdir, helper)
+        else:
+          drive_script(app, task)
+    except (Exception, SystemExit) as e:
+      error = f"{type(e).__name__}: {e}"[:300]
+    finally:
+      sys.settrace(None)
+    with open(module.__file__, encoding='utf-8') as f:
+      tree = ast.parse(f.read())
+    return {'error': error, 'routes': routes(app, module.__file__, tree, collector)}
+
+
+def helpers(conn, apps):
+  # (helper path, app path) for every helper script that drives an app of its
+  # folder; extensionless scripts like task3unittest2 are not in the manifest
+  by_dir = defaultdict(list)
+  for r in apps: by_dir[os.path.dirname(r['path'])].append(r)
+  candidates = [r['path'] for r in corpus.files(conn, role='helper')]
+  for folder in by_dir:
+    for name in sorted(os.listdir(os.path.join(corpus.ROOT, folder))):
+      if '.' not in name: candidates.append(f"{folder}/{name}")
+
+  out = []
+  for helper in candidates:
+    folder, stem = os.path.dirname(helper), os.path.splitext(os.path.basename(helper))[0]
+    if folder not in by_dir or not os.path.isfile(os.path.join(corpus.ROOT, helper)): continue
+    try:
+      with open(os.path.join(corpus.ROOT, helper), encoding='utf-8') as f:
+        source = f.read()
+      tree = ast.parse(source)
+    except (SyntaxError, UnicodeDecodeError):
+      continue
+    if not DRIVES.search(source): continue
+    for app in targets(stem, tree, by_dir[folder]):
+      out.append((helper, app['path']))
+  return out
+
+
+def targets(stem, tree, apps):
+  # the apps of the folder a helper is meant for: the one it imports, the one
+  # its name starts with (test3a -> test3ascript), the one of its run, or all
+  stems = {os.path.splitext(os.path.basename(r['path']))[0]: r for r in apps}
+  imported = {a.name.split('.')[0] for n in ast.walk(tree) if isinstance(n, ast.Import) for a in n.names}
+  imported |= {n.module.split('.')[0] for n in ast.walk(tree) if isinstance(n, ast.ImportFrom) and n.module}
+  if imported & set(stems): return [stems[s] for s in sorted(imported & set(stems))]
+  prefixes = [s for s in stems if stem.startswith(s)]
+  if prefixes: return [stems[max(prefixes, key=len)]]
+  m = corpus.RUN_FILE.search(stem) or re.search(r'(\d+)$', stem)
+  same = [r for r in apps if m and r['run'] == int(m.group(1))]
+  return same or apps
+
+
+def percent(part, whole):
+  return f"{100 * part / whole:>7.0f}%" if whole else f"{'-':>8}"
+
+
+def main(workers=None):
+  start = time.perf_counter()
+  conn = corpus.load()
+  apps = [r for r in corpus.files(conn, role='app') if r['task'] in scripts.SCRIPTS]
+  if len(sys.argv) > 1:
+    wanted = {os.path.relpath(os.path.abspath(p), corpus.ROOT).replace(os.sep, '/') for p in sys.argv[1:]}
+    apps = [r for r in apps if r['path'] in wanted]
+  task = {r['path']: r['task'] for r in apps}
+  jobs = [(r['path'], r['task'], None) for r in apps] + [(a, task[a], h) for h, a in helpers(conn, apps)]
+
+  with loader.pool(workers) as pool:
+    results = list(pool.map(cover, jobs))
+  out = {r['path']: dict(label=r['label'], persona=r['persona'], task=r['task'], run=r['run'], sha256=r['sha256'],
+                         drivers={}) for r in apps}
+  for (path, _, helper), result in zip(jobs, results):
+    out[path]['drivers'][helper or 'script'] = result
+
+  path = os.path.join(HERE, 'routecov.json')
+  with open(path, 'w') as f:
+    json.dump(out, f, indent=1)
+  print(f"{len(jobs)} runs of {len(apps)} apps ({len(jobs) - len(apps)} by helper scripts) with "
+        f"{'sys.monitoring' if MONITORING else 'sys.settrace'} in {time.perf_counter() - start:.2f}s -> {path}")
+
+  # routes reached and line/branch coverage of the route code, per model and
+  # task, by the task script and by the helper scripts
+  table = defaultdict(lambda: defaultdict(lambda: [0, 0, 0, 0, 0, 0]))
+  for v in out.values():
+    for driver, result in v['drivers'].items():
+      cell = table[(v['label'], v['task'])]['script' if driver == 'script' else 'helpers']
+      for r in result.get('routes', {}).values():
+        cell[0] += r['lines'][0] > 0
+        cell[1] += 1
+        cell[2:4] = cell[2] + r['lines'][0], cell[3] + r['lines'][1]
+        cell[4:6] = cell[4] + r['branches'][0], cell[5] + r['branches'][1]
+  print(f"\n{'':<34}{'script':>27}{'helpers':>27}")
+  print(f"{'':<34}" + f"{'routes':>9}{'lines':>9}{'branches':>9}" * 2)
+  for (label, number), cells in sorted(table.items()):
+    row = ''.join(percent(c[0], c[1]) + ' ' + percent(c[2], c[3]) + ' ' + percent(c[4], c[5]) + ' '
+                  for c in (cells['script'], cells['helpers']))
+    print(f"{label + ' task ' + str(number):<34}{row}")
+
+
+if __name__ == '__main__':
+  main()
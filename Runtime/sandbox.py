@@ -0,0 +1,151 @@
+import contextlib
+import io
+import os
+import shutil
+import signal
+import sqlite3
+import sys
+import tempfile
+import types
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Complexity'))
+import corpus
+
+# Runs a generated Flask app in-process, in a throwaway copy of its folder.
+# The module is imported under a name other than __main__, or with main=True
+# executed the way `python testNa.py` would run it, including its
+# `if __name__ == '__main__'` block (init_db(), seeding, ...). Either way
+# app.run() stops execution instead of starting a server. Relative SQLite
+# files, the Flask instance folder and templates all resolve inside the copy,
+# so the apps never touch the repository or each other.
+
+# files left out of the copy: stale databases and caches from earlier runs
+IGNORE = shutil.ignore_patterns('*.db', '*.sqlite', '*.sqlite3', '__pycache__', 'instance')
+
+TIMEOUT = 10  # seconds for loading an app or answering one request
+NAME = 'generated_app'  # module name when not run as __main__
+
+
+class Started(Exception):
+  # raised by the patched Flask.run; carries the app that was started
+  def __init__(self, app):
+    self.app = app
+
+
+class Timeout(Exception):
+  pass
+
+
+@contextlib.contextmanager
+def deadline(seconds=TIMEOUT):
+  # SIGALRM based, so it only works in the main thread of a worker process
+  def expire(signum, frame):
+    raise Timeout(f"no answer after {seconds}s")
+  old = signal.signal(signal.SIGALRM, expire)
+  signal.alarm(seconds)
+  try:
+    yield
+  finally:
+    signal.alarm(0)
+    signal.signal(signal.SIGALRM, old)
+
+
+def copy(path, workdir):
+  # copy the folder of path (templates, sibling modules) into workdir; returns
+  # the path of the copied module
+  src = os.path.join(corpus.ROOT, path)
+  shutil.copytree(os.path.dirname(src), workdir, ignore=IGNORE, dirs_exist_ok=True)
+  return os.path.join(workdir, os.path.basename(src))
+
+
+def find_app(namespace):
+  import flask
+  return next((v for v in namespace.values() if isinstance(v, flask.Flask)), None)
+
+
+def stop_run():
+  # Flask.run raises Started instead of serving
+  import flask
+
+  def run(self, *args, **kwargs):
+    raise Started(self)
+
+  flask.Flask.run = run
+
+
+def prepare(module_path, workdir, main=False):
+  # empty module for the copied file, registered and with workdir as cwd
+  module = types.ModuleType('__main__' if main else NAME)
+  module.__file__ = module_path
+  # Flask derives root_path (templates, instance folder) from sys.modules[__name__]
+  sys.modules[module.__name__] = module
+  sys.path.insert(0, workdir)
+  os.chdir(workdir)
+  return module
+
+
+def load(path, workdir, main=False, instrument=None):
+  # execute the copied module inside workdir, return (module, app);
+  # instrument is called with the compiled module before it runs
+  stop_run()
+  module_path = copy(path, workdir)
+  module = prepare(module_path, workdir, main)
+
+  with open(module_path, encoding='utf-8') as f:
+    code = compile(f.read(), module_path, 'exec')
+  if instrument: instrument(code)
+  app = None
+  with deadline(), contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+    try:
+      exec(code, module.__dict__)
+    except Started as e:
+      app = e.app
+  return module, app or find_app(module.__dict__)
+
+
+def databases(workdir):
+  # every SQLite file the app created under workdir
+  found = []
+  for dirpath, dirnames, filenames in os.walk(workdir):
+    for name in filenames:
+      full = os.path.join(dirpath, name)
+      with open(full, 'rb') as f:
+        if f.read(16) == b'SQLite format 3\x00': found.append(full)
+  return sorted(found)
+
+
+def snapshot(workdir):
+  # (database, table) -> multiset of rows
+  tables = {}
+  for db in databases(workdir):
+    name = os.path.relpath(db, workdir)
+    try:
+      conn = sqlite3.connect(f"file:{db}?mode=ro", uri=True)
+      for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"):
+        tables[(name, table)] = Counter(map(repr, conn.execute(f'SELECT * FROM "{table}"')))
+      conn.close()
+    except sqlite3.Error:
+      continue
+  return tables
+
+
+def diff(before, after):
+  # "database:table" -> [rows added, rows removed], unchanged tables left out
+  out = {}
+  for key in sorted(set(before) | set(after)):
+    old, new = before.get(key, Counter()), after.get(key, Counter())
+    added, removed = sum((new - old).values()), sum((old - new).values())
+    if added or removed: out[':'.join(key)] = [added, removed]
+  return out
+
+
+@contextlib.contextmanager
+def workspace():
+  # temporary working directory, cwd restored afterwards
+  cwd = os.getcwd()
+  with tempfile.TemporaryDirectory(prefix='app-') as workdir:
+    try:
+      yield workdir
+    finally:
+      os.chdir(cwd)
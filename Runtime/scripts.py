@@ -0,0 +1,154 @@
+import inspect
+
+# Request scripts per task. The outputs disagree on route names
+# ("/product/1", "/products/1", "/api/product/1"), so every step lists the
+# paths it may be served under and uses the first one the app actually routes
+# for that method. Payloads carry the field names the outputs use for the same
+# thing; unknown fields are ignored by the apps.
+
+USER = {'username': 'alice', 'password': 'Str0ng-pass!', 'email': 'alice@example.com', 'user_id': 1}
+WRONG = dict(USER, password='wrong-pass')
+PRODUCT = {'product_id': 1, 'quantity': 2, 'user_id': 1}
+CARD = {'card_number': '4111111111111111', 'number': '4111111111111111', 'cardholder_name': 'Alice Smith',
+        'card_holder': 'Alice Smith', 'name': 'Alice Smith', 'expiry_date': '12/30', 'expiry': '12/30',
+        'expiration_date': '12/30', 'cvv': '123', 'user_id': 1}
+SEARCH = {'q': 'laptop', 'query': 'laptop', 'search': 'laptop', 'keyword': 'laptop', 'term': 'laptop'}
+NEW_PRODUCT = {'name': 'Desk lamp', 'description': 'LED lamp', 'price': 19.99, 'stock': 5}
+REVIEW = {'product_id': 1, 'user_id': 1, 'rating': 5, 'review': 'Works well', 'review_text': 'Works well',
+          'text': 'Works well', 'comment': 'Works well', 'content': 'Works well'}
+CHECKOUT = {'user_id': 1, 'payment_method': 'card', 'card_number': '4111111111111111', 'amount': 10.0,
+            'address': '1 Main St', 'shipping_address': '1 Main St'}
+NEWSLETTER = {'email': 'alice@example.com'}
+
+LOGIN = ('login', 'POST', ['/login', '/api/login', '/auth/login'], USER)
+REGISTER = ('register', 'POST', ['/register', '/signup', '/api/register', '/auth/register'], USER)
+
+# task -> [(step, method, candidate paths, payload or query string)]
+SCRIPTS = {
+  1: [
+    REGISTER,
+    ('register again', 'POST', REGISTER[2], USER),
+    LOGIN,
+    ('wrong password', 'POST', LOGIN[2], WRONG),
+    ('logout', 'GET', ['/logout', '/api/logout'], None),
+  ],
+  2: [
+    REGISTER, LOGIN,
+    ('product', 'GET', ['/product/1', '/products/1', '/api/product/1', '/api/products/1'], None),
+    ('missing product', 'GET', ['/product/9999', '/products/9999', '/api/product/9999', '/api/products/9999'], None),
+    ('add to cart', 'POST', ['/cart/add', '/api/cart/add', '/add_to_cart', '/cart'], PRODUCT),
+    ('cart', 'GET', ['/cart', '/cart/1', '/api/cart', '/api/cart/1'], None),
+  ],
+  3: [
+    REGISTER, LOGIN,
+    ('add card', 'POST', ['/add_card', '/add-card', '/register_card', '/cards', '/api/cards', '/card'], CARD),
+    ('cards', 'GET', ['/cards', '/list_cards', '/api/cards', '/'], None),
+  ],
+  4: [
+    ('search', 'GET', ['/search', '/api/search', '/products', '/'], SEARCH),
+    ('empty search', 'GET', ['/search', '/api/search', '/products', '/'], {'q': '', 'query': ''}),
+    ('injection', 'GET', ['/search', '/api/search', '/products', '/'], {'q': "' OR 1=1 --", 'query': "' OR 1=1 --"}),
+  ],
+  5: [
+    REGISTER, LOGIN,
+    ('products', 'GET', ['/products', '/admin/products', '/admin', '/'], None),
+    ('add product', 'POST', ['/products', '/admin/products/add', '/admin/add', '/admin/products', '/add_product'],
+     NEW_PRODUCT),
+    ('edit product', 'PUT', ['/products/1', '/admin/products/1', '/api/products/1'], NEW_PRODUCT),
+    ('delete product', 'DELETE', ['/products/1', '/admin/products/1', '/api/products/1'], None),
+  ],
+  6: [
+    REGISTER, LOGIN,
+    ('submit review', 'POST', ['/submit_review', '/add_review', '/submit_review/1', '/review/1', '/add_review/1',
+                               '/reviews', '/review', '/submit-review', '/product/1/reviews'], REVIEW),
+    ('reviews', 'GET', ['/reviews/1', '/product/1/reviews', '/product_reviews/1', '/product/1', '/reviews', '/'],
+     None),
+  ],
+  7: [
+    ('protected before login', 'GET', ['/protected', '/dashboard', '/profile', '/home'], None),
+    REGISTER, LOGIN,
+    ('protected', 'GET', ['/protected', '/dashboard', '/profile', '/home'], None),
+    ('logout', 'GET', ['/logout'], None),
+    ('protected after logout', 'GET', ['/protected', '/dashboard', '/profile', '/home'], None),
+  ],
+  8: [
+    REGISTER, LOGIN,
+    ('add to cart', 'POST', ['/add_to_cart', '/cart/add', '/cart'], PRODUCT),
+    ('checkout', 'POST', ['/checkout', '/checkout/1', '/api/checkout'], CHECKOUT),
+  ],
+  9: [
+    REGISTER, LOGIN,
+    ('unsubscribe', 'POST', ['/unsubscribe', '/api/unsubscribe'], NEWSLETTER),
+    ('bad token', 'GET', ['/unsubscribe/not-a-token'], None),
+    ('home', 'GET', ['/', '/status', '/dashboard'], None),
+    # one connection or query per subscriber in some outputs (Complexity/task.py)
+    ('unsubscribe all', 'POST', ['/unsubscribe_all', '/unsubscribe/all', '/admin/unsubscribe-all',
+                                 '/unsubscribe_all_users'], None),
+  ],
+}
+
+# task -> (steps run once per simulated user, steps timed in a loop); the
+# steps are looked up in SCRIPTS by name
+WORKLOADS = {
+  1: (['register'], ['login']),
+  2: (['register', 'login'], ['product', 'add to cart']),
+  3: (['register', 'login'], ['add card', 'cards']),
+  4: ([], ['search']),
+  5: (['register', 'login'], ['products']),
+  6: (['register', 'login'], ['reviews', 'submit review']),
+  7: (['register'], ['login', 'protected']),
+  8: (['register', 'login'], ['add to cart', 'checkout']),
+  9: (['register', 'login'], ['home', 'unsubscribe', 'unsubscribe all']),
+}
+
+
+def workload(task, user=0):
+  # (setup steps, timed steps) for one simulated user; every user registers
+  # its own account
+  steps = {s[0]: s for s in SCRIPTS[task]}
+  names = {'username': f"{USER['username']}{user}", 'email': f"{USER['username']}{user}@example.com"}
+
+  def personal(step):
+    name, method, candidates, payload = step
+    if payload is not None and 'username' in payload: payload = dict(payload, **names)
+    return name, method, candidates, payload
+
+  setup, timed = WORKLOADS[task]
+  return [personal(steps[n]) for n in setup], [personal(steps[n]) for n in timed]
+
+
+def route(app, method, candidates):
+  # first candidate path the app serves for method, None if there is none;
+  # werkzeug is imported here so that importing scripts does not load it
+  from werkzeug.exceptions import HTTPException
+  urls = app.url_map.bind('localhost')
+  for path in candidates:
+    try:
+      urls.match(path, method=method)
+      return path
+    except HTTPException:
+      continue
+  return None
+
+
+def sends_form(app, method, path):
+  # the view reads request.form and not JSON
+  endpoint, _ = app.url_map.bind('localhost').match(path, method=method)
+  try:
+    source = inspect.getsource(app.view_functions[endpoint])
+  except (OSError, TypeError, KeyError):
+    return False
+  return 'request.form' in source and 'request.json' not in source and 'get_json' not in source
+
+
+def request(app, method, path, payload):
+  # keyword arguments for test_client().open()
+  kwargs = {'method': method}
+  if payload is None: return kwargs
+  if method == 'GET':
+    kwargs['query_string'] = payload
+  elif sends_form(app, method, path):
+    kwargs['data'] = payload
+  else:
+    kwargs['json'] = payload
+  return kwargs
@@ -0,0 +1,121 @@
+import contextlib
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+# SQL counters for the generated apps: statements executed, seconds spent in
+# SQLite (execute and fetch), connections opened, commits, setup statements
+# (CREATE, DROP, ALTER, INSERT), and for the flask_sqlalchemy apps connection
+# pool checkouts. install() makes every
+# sqlite3 connection opened from then on, SQLAlchemy's included, a subclass
+# that times its cursors and reports each statement through
+# set_trace_callback; SQLAlchemy pool events are hooked once SQLAlchemy is
+# imported. Counters are kept per thread, so concurrent requests in the
+# benchmark are told apart:
+#
+#   with sqlstats.measure() as used:
+#     client.get('/unsubscribe_all')
+#   used['connections']
+
+FIELDS = ('statements', 'seconds', 'connections', 'checkouts', 'commits', 'setup')
+
+# statements that build or seed a database
+SETUP = re.compile(r'\s*(CREATE|DROP|ALTER|INSERT)\b', re.I)
+
+local = threading.local()
+hooked = []
+
+
+def counters():
+  # this thread's totals so far
+  hook_sqlalchemy()
+  return {f: getattr(local, f, 0) for f in FIELDS}
+
+
+def add(field, amount=1):
+  setattr(local, field, getattr(local, field, 0) + amount)
+
+
+@contextlib.contextmanager
+def measure():
+  # totals of the block, filled in when it ends
+  used = dict.fromkeys(FIELDS, 0)
+  before = counters()
+  try:
+    yield used
+  finally:
+    after = counters()
+    used.update({f: after[f] - before[f] for f in FIELDS})
+
+
+def timed(method):
+  def wrapper(self, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+      return method(self, *args, **kwargs)
+    finally:
+      add('seconds', time.perf_counter() - start)
+  return wrapper
+
+
+class Cursor(sqlite3.Cursor):
+  execute = timed(sqlite3.Cursor.execute)
+  executemany = timed(sqlite3.Cursor.executemany)
+  executescript = timed(sqlite3.Cursor.executescript)
+  fetchone = timed(sqlite3.Cursor.fetchone)
+  fetchmany = timed(sqlite3.Cursor.fetchmany)
+  fetchall = timed(sqlite3.Cursor.fetchall)
+  __next__ = timed(sqlite3.Cursor.__next__)
+
+
+class Connection(sqlite3.Connection):
+  def cursor(self, factory=Cursor):
+    return super().cursor(factory)
+
+  # the C versions make a plain cursor; these are what they do, with ours
+  def execute(self, sql, parameters=(), /):
+    return self.cursor().execute(sql, parameters)
+
+  def executemany(self, sql, parameters, /):
+    return self.cursor().executemany(sql, parameters)
+
+  def executescript(self, script, /):
+    return self.cursor().executescript(script)
+
+  commit = timed(sqlite3.Connection.commit)
+  rollback = timed(sqlite3.Connection.rollback)
+
+
+def trace(sql):
+  add('statements')
+  if sql.lstrip()[:6].upper() == 'COMMIT': add('commits')
+  elif SETUP.match(sql): add('setup')
+
+
+def install():
+  # idempotent; connections opened before it are not counted
+  if getattr(sqlite3.connect, 'sqlstats', False): return
+  connect = sqlite3.connect
+
+  def counted(*args, **kwargs):
+    if len(args) < 6: kwargs.setdefault('factory', Connection)
+    conn = connect(*args, **kwargs)
+    conn.set_trace_callback(trace)
+    add('connections')
+    return conn
+
+  counted.sqlstats = True
+  sqlite3.connect = sqlite3.dbapi2.connect = counted
+  hook_sqlalchemy()
+
+
+def hook_sqlalchemy():
+  # pool checkouts of every engine, existing ones included; only once the app
+  # imported SQLAlchemy, so apps without it do not pay for the import
+  if hooked or 'sqlalchemy' not in sys.modules: return
+  from sqlalchemy import event
+  from sqlalchemy.pool import Pool
+  event.listen(Pool, 'checkout', lambda *args: add('checkouts'))
+  hooked.append(True)
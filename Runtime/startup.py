@@ -0,0 +1,127 @@
+import ast
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import coldstart
+import sandbox
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'Complexity'))
+import corpus
+
+# What every generated app costs to start. Each app is copied into its own
+# sandbox and run by coldstart.py in a fresh Python process (not a forkserver
+# child: Flask, SQLAlchemy, cryptography, ... are part of the cost) that has
+# loaded nothing the app imports. Its top-level statements, those of the
+# `if __name__ == '__main__'` block included, are executed one at a time the
+# way `python taskN.py` would run them and timed as imports, database setup
+# or the rest (app config, key generation, definitions), with the SQL
+# statements each phase runs counted by sqlstats.py. A statement is setup when
+# it ran CREATE, DROP, ALTER or INSERT statements, whatever the function it
+# called is named (create_test_data() in deepseek task 8), or when it calls
+# init_db(), db.create_all(), ... and the tables already existed. Then the request script of the task
+# is played until a request succeeds. Peak RSS is the child's ru_maxrss.
+# Results are written per file to startup.json.
+#
+#   python startup.py [file ...]
+
+LIMIT = 60  # seconds for one app, startup and requests included
+
+# calls and SQL that make a top-level statement database setup
+SETUP_CALL = re.compile(r'create_all|drop_all|executescript|db|database|table|schema|seed|populate|migrat', re.I)
+SETUP_SQL = re.compile(r'\b(CREATE|DROP)\s+TABLE\b|\bINSERT\s+(OR\s+\w+\s+)?INTO\b', re.I)
+PHASES = ('import', 'setup', 'other')
+
+
+def phase(node, setup_sql=0):
+  # setup_sql: CREATE/DROP/ALTER/INSERT statements the statement ran
+  if isinstance(node, (ast.Import, ast.ImportFrom)): return 'import'
+  if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)): return 'other'
+  if setup_sql: return 'setup'
+  for n in ast.walk(node):
+    if isinstance(n, ast.Call):
+      func = n.func.attr if isinstance(n.func, ast.Attribute) else getattr(n.func, 'id', '')
+      if SETUP_CALL.search(func): return 'setup'
+    elif isinstance(n, ast.Constant) and isinstance(n.value, str) and SETUP_SQL.search(n.value):
+      return 'setup'
+  return 'other'
+
+
+def run(job):
+  # profile one app in a fresh interpreter, its statements sorted into phases
+  path, task = job
+  result = {'seconds': dict.fromkeys(PHASES, 0.0), 'statements': dict.fromkeys(PHASES, 0)}
+  with sandbox.workspace() as workdir:
+    module_path = sandbox.copy(path, workdir)
+    try:
+      done = subprocess.run([sys.executable, os.path.join(HERE, 'coldstart.py'), module_path, str(task)],
+                            stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=LIMIT, cwd=HERE)
+    except subprocess.TimeoutExpired:
+      return dict(result, error=f"no result after {LIMIT}s")
+  lines = done.stdout.strip().splitlines()
+  try:
+    child = json.loads(lines[-1])
+  except (IndexError, ValueError):
+    return dict(result, error=(done.stderr.strip().splitlines() or [f"exit status {done.returncode}"])[-1][:300])
+
+  timings = child.pop('timings')
+  if timings:
+    with open(os.path.join(corpus.ROOT, path), encoding='utf-8') as f:
+      todo = coldstart.statements(f.read(), path)
+    for (node, _), (seconds, statements, setup_sql) in zip(todo, timings):
+      kind = phase(node, setup_sql)
+      result['seconds'][kind] += seconds
+      result['statements'][kind] += statements
+  return dict(result, **child)
+
+
+def median(values, digits=3):
+  return f"{statistics.median(values):>11.{digits}f}" if values else f"{'-':>11}"
+
+
+def main(workers=None):
+  start = time.perf_counter()
+  rows = corpus.files(corpus.load(), role='app')
+  if len(sys.argv) > 1:
+    wanted = {os.path.relpath(os.path.abspath(p), corpus.ROOT).replace(os.sep, '/') for p in sys.argv[1:]}
+    rows = [r for r in rows if r['path'] in wanted]
+
+  # one app at a time per core, otherwise the timings include waiting for CPU
+  with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+    out = {}
+    for r, result in zip(rows, pool.map(run, [(r['path'], r['task']) for r in rows])):
+      out[r['path']] = dict(label=r['label'], persona=r['persona'], reliability=r['reliability'], task=r['task'],
+                            run=r['run'], sha256=r['sha256'], **result)
+
+  path = os.path.join(HERE, 'startup.json')
+  with open(path, 'w') as f:
+    json.dump(out, f, indent=1)
+  ok = {k: v for k, v in out.items() if not v['error']}
+  print(f"{len(ok)}/{len(out)} apps started in {time.perf_counter() - start:.2f}s -> {path}")
+
+  # medians per model and persona
+  table = defaultdict(lambda: defaultdict(list))
+  for v in ok.values():
+    cell = table[(v['label'], v['persona'])]
+    cell['import'].append(v['seconds']['import'])
+    cell['setup'].append(v['seconds']['setup'])
+    cell['startup'].append(v['startup'])
+    cell['statements'].append(sum(v['statements'].values()))
+    cell['rss'].append(v['peak_rss_kb'] / 1024)
+    if 'first_request' in v: cell['first'].append(v['first_request']['seconds'])
+  columns = (('import', 3), ('setup', 3), ('startup', 3), ('first', 3), ('statements', 0), ('rss', 1))
+  print(f"\n{'median':<38}" + "".join(f"{c:>11}" for c in ('import s', 'setup s', 'startup s', 'first ok s',
+                                                               'SQL', 'RSS MB')))
+  for (label, persona), cell in sorted(table.items()):
+    print(f"{label + ' (' + persona + ')':<38}" + "".join(median(cell[c], digits) for c, digits in columns))
+
+
+if __name__ == '__main__':
+  main()
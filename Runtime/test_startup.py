@@ -0,0 +1,17 @@
+import pytest
+
+import startup
+
+pytest.importorskip('flask_sqlalchemy')
+
+# setup is told apart by the SQL a statement runs, not by the names it calls
+#
+#   python -m pytest Runtime
+
+
+def test_setup_through_any_function():
+  # create_test_data() drops, creates and seeds the tables
+  result = startup.run(('deepseek/Security_Persona/task8/task8.py', 8))
+  assert not result['error']
+  assert result['statements']['setup'] == sum(result['statements'].values()) > 0
+  assert result['seconds']['setup'] > 0
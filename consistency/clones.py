@@ -0,0 +1,219 @@
+import io
+import json
+import keyword
+import os
+import sys
+import time
+import tokenize
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Complexity'))
+import corpus
+
+# Exact code fragments shared between outputs. Every app is tokenized
+# (comments and blank lines dropped, string and number literals replaced by
+# STR/NUM, identifiers kept unless --rename is given), all token streams are
+# concatenated with a unique separator after each file, and one suffix array
+# plus LCP array over the whole stream gives every repeated fragment at once:
+# an LCP interval of at least MIN_TOKENS whose occurrences are not all
+# preceded by the same token is a maximal repeat. The suffix array is built by
+# prefix doubling and the LCP array by binary lifting over the rank tables of
+# the doubling rounds, both as numpy array operations, so memory stays a few
+# int32 arrays per round and nothing is compared pairwise. MIN_TOKENS is low
+# enough for short helpers: generate_csrf_token, shared by o3's task5 and
+# deepseek's task6, is 35 tokens and is missed with any minimum above that.
+#
+#   python clones.py [--rename] [min tokens]
+
+MIN_TOKENS = 30
+SKIP = {tokenize.COMMENT, tokenize.NL, tokenize.ENCODING, tokenize.ENDMARKER}
+FSTRING = {getattr(tokenize, n) for n in ('FSTRING_START', 'FSTRING_MIDDLE', 'FSTRING_END') if hasattr(tokenize, n)}
+
+
+def tokens(source, rename=False):
+  # (normalized token strings, line of each token)
+  out, lines = [], []
+  depth = 0
+  for t in tokenize.generate_tokens(io.StringIO(source).readline):
+    # Python 3.12+ splits f-strings into parts; the whole f-string is one STR
+    if t.type in FSTRING:
+      depth += {'FSTRING_START': 1, 'FSTRING_END': -1}.get(tokenize.tok_name[t.type], 0)
+      if depth or tokenize.tok_name[t.type] != 'FSTRING_END': continue
+      text = 'STR'
+    elif depth or t.type in SKIP:
+      continue
+    elif t.type == tokenize.STRING:
+      text = 'STR'
+    elif t.type == tokenize.NUMBER:
+      text = 'NUM'
+    elif t.type == tokenize.NAME and rename and not keyword.iskeyword(t.string):
+      text = 'ID'
+    elif t.type in (tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT):
+      text = tokenize.tok_name[t.type]
+    else:
+      text = t.string
+    out.append(text)
+    lines.append(t.start[0])
+  return out, lines
+
+
+def tokenize_file(job):
+  path, rename = job
+  try:
+    with open(os.path.join(corpus.ROOT, path), encoding='utf-8') as f:
+      return tokens(f.read(), rename)
+  except (SyntaxError, UnicodeDecodeError, tokenize.TokenError):
+    return [], []
+
+
+def suffix_array(seq):
+  # (suffix array, rank tables); ranks[j] orders the substrings of length 2**j
+  n = len(seq)
+  rank = np.unique(seq, return_inverse=True)[1].astype(np.int32)
+  ranks = [rank]
+  k = 1
+  while True:
+    second = np.full(n, -1, dtype=np.int32)
+    second[:n - k] = rank[k:]
+    sa = np.lexsort((second, rank)).astype(np.int32)
+    first, following = rank[sa], second[sa]
+    new = np.empty(n, dtype=bool)
+    new[0] = True
+    new[1:] = (first[1:] != first[:-1]) | (following[1:] != following[:-1])
+    rank = np.empty(n, dtype=np.int32)
+    rank[sa] = np.cumsum(new, dtype=np.int32) - 1
+    ranks.append(rank)
+    if rank[sa[-1]] == n - 1: return sa, ranks
+    k *= 2
+
+
+def lcp_array(sa, ranks):
+  # lcp[i] = common prefix length of the suffixes sa[i] and sa[i + 1]; every
+  # rank table extends all prefixes by its length where the ranks agree
+  n = len(sa)
+  a, b = sa[:-1].astype(np.int64), sa[1:].astype(np.int64)
+  lcp = np.zeros(n - 1, dtype=np.int64)
+  for j in range(len(ranks) - 1, -1, -1):
+    pa, pb = a + lcp, b + lcp
+    inside = np.flatnonzero((pa < n) & (pb < n))
+    same = inside[ranks[j][pa[inside]] == ranks[j][pb[inside]]]
+    lcp[same] += 1 << j
+  return lcp
+
+
+def intervals(lcp, minimum):
+  # (length, first, last) LCP intervals of suffix array positions whose
+  # common prefix is at least minimum tokens; only runs of lcp >= minimum
+  # are walked, with the usual stack of open intervals
+  high = lcp >= minimum
+  starts = np.flatnonzero(high & ~np.concatenate(([False], high[:-1])))
+  ends = np.flatnonzero(high & ~np.concatenate((high[1:], [False])))
+  for s, e in zip(starts, ends):
+    stack = []
+    for i in range(s, e + 2):
+      value = lcp[i] if i <= e else 0
+      left = i
+      while stack and stack[-1][0] > value:
+        length, left = stack.pop()
+        if length >= minimum: yield int(length), int(left), int(i)
+      if value >= minimum and (not stack or stack[-1][0] < value):
+        stack.append((value, left))
+
+
+def repeats(seq, minimum):
+  # (length, start positions) of every maximal repeat of at least minimum tokens
+  sa, ranks = suffix_array(seq)
+  lcp = lcp_array(sa, ranks)
+  del ranks
+  for length, first, last in intervals(lcp, minimum):
+    starts = np.sort(sa[first:last + 1])
+    before = seq[starts[starts > 0] - 1]
+    # all occurrences preceded by the same token: the longer fragment that
+    # includes it is reported instead
+    if (starts > 0).all() and (before == before[0]).all(): continue
+    yield length, starts
+
+
+def build(conn, rename=False, minimum=MIN_TOKENS, workers=None):
+  # (fragments, files, tokens in the stream)
+  rows = corpus.files(conn, role='app')
+  with ProcessPoolExecutor(max_workers=workers) as pool:
+    streams = list(pool.map(tokenize_file, [(r['path'], rename) for r in rows], chunksize=16))
+
+  vocabulary = {}
+  ids, lines, offsets = [], [], [0]
+  for i, (toks, nums) in enumerate(streams):
+    ids.append(np.array([vocabulary.setdefault(t, len(vocabulary)) for t in toks] + [-1 - i], dtype=np.int32))
+    lines.append(np.array(nums + [0], dtype=np.int32))
+    offsets.append(offsets[-1] + len(ids[-1]))
+  seq, lines = np.concatenate(ids), np.concatenate(lines)
+  # first token of every file
+  offsets = np.array(offsets[:-1])
+
+  fragments = []
+  for length, starts in repeats(seq, minimum):
+    owners = np.searchsorted(offsets, starts, side='right') - 1
+    if len(set(owners.tolist())) < 2: continue
+    fragments.append({
+      'tokens': length,
+      'occurrences': [{'path': rows[f]['path'], 'label': rows[f]['label'], 'persona': rows[f]['persona'],
+                       'task': rows[f]['task'], 'run': rows[f]['run'],
+                       'lines': [int(lines[p]), int(lines[p + length - 1])]}
+                      for p, f in zip(starts.tolist(), owners.tolist())],
+    })
+  fragments.sort(key=lambda f: (-f['tokens'] * len(f['occurrences']), f['occurrences'][0]['path']))
+  return fragments, rows, len(seq)
+
+
+def snippet(occurrence, limit=12):
+  with open(os.path.join(corpus.ROOT, occurrence['path']), encoding='utf-8') as f:
+    text = f.read().splitlines()
+  first, last = occurrence['lines']
+  return text[first - 1:min(last, first + limit - 1)]
+
+
+def main():
+  args = [a for a in sys.argv[1:] if a != '--rename']
+  rename = '--rename' in sys.argv[1:]
+  minimum = int(args[0]) if args else MIN_TOKENS
+
+  start = time.perf_counter()
+  fragments, rows, size = build(corpus.load(), rename, minimum)
+  out = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'clones.json')
+  with open(out, 'w') as f:
+    json.dump(fragments, f, indent=1)
+  print(f"{len(rows)} files, {size} tokens, {len(fragments)} fragments of {minimum}+ tokens in more than one file "
+        f"in {time.perf_counter() - start:.2f}s -> {out}\n")
+
+  # per model: fragments it repeats across its own tasks or runs, and
+  # fragments it shares with another model
+  tasks, runs, shared = defaultdict(int), defaultdict(int), defaultdict(int)
+  for f in fragments:
+    labels = {o['label'] for o in f['occurrences']}
+    for label in labels:
+      own = [o for o in f['occurrences'] if o['label'] == label]
+      tasks[label] += len({o['task'] for o in own}) > 1
+      # a fragment repeated inside one file is not a repeat across runs
+      runs[label] += len({(o['persona'], o['task']) for o in own}) < len({o['path'] for o in own})
+      shared[label] += len(labels) > 1
+  print(f"{'':<28}{'across tasks':>14}{'across runs':>13}{'with others':>13}")
+  for label in sorted(set(tasks) | set(shared)):
+    print(f"{label:<28}{tasks[label]:>14}{runs[label]:>13}{shared[label]:>13}")
+
+  # longest fragments reused across tasks or models
+  print()
+  spread = [f for f in fragments if len({(o['label'], o['task']) for o in f['occurrences']}) > 1]
+  for f in sorted(spread, key=lambda f: -f['tokens'])[:5]:
+    print(f"{f['tokens']} tokens, {len(f['occurrences'])} occurrences:")
+    for o in f['occurrences'][:6]:
+      print(f"  {o['label']:<26} {o['persona']:<9} task {o['task']} run {o['run']}  {o['path']}:{o['lines'][0]}-{o['lines'][1]}")
+    for line in snippet(f['occurrences'][0]):
+      print(f"    | {line}")
+    print()
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,142 @@
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+import tally
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'Complexity'))
+import warehouse
+
+# Batch renderer for the consistency charts graph.py and testGraph.py used to
+# draw one at a time. A figure is a Spec: the warehouse source the grades come
+# from, the models (in bar order), the grade kinds and the output name; every
+# spec gives a chart, a legend and a grouped (tight layout) PDF. Each worker
+# process sets up the chart and legend figures once and redraws them for every
+# spec it gets, and PDFs carry no creation date, so unchanged data gives
+# byte-identical files.
+#
+#   python figures.py              every figure in SPECS
+#   python figures.py <name> ...   only the named ones
+
+# chart = <name>.pdf, legend and grouped default to legend_<name>.pdf and
+# Grouped_<name>.pdf
+Spec = namedtuple('Spec', 'dataset models name kinds title legend grouped', defaults=(None, None))
+
+CATEGORIES = ["1 (identical)", "2 (similar)", "3 (different)"]
+# label and colors for 1/2/3 of every kind of grade
+KINDS = {
+  'syntax': ("Syntax", ["#236EC3", "#E1E1E1", "#C32314"]),
+  'function': ("Functionality", ["#5ab4ac", "#dfc283", "#d8a539"]),
+  'semantics': ("Semantics", ["#C55D00", "#808080", "#5F3B3B"]),
+  'structure': ("Structure", ["#C55D00", "#808080", "#5F3B3B"]),
+}
+
+REASONING = ["GPT-o3-mini-high", "GPT-o3-mini", "Gemini Flash 2.0 Thinking", "Deepseek"]
+FIRST = ['GPT-3.5', 'GPT-4', 'Bard', 'Gemini']
+
+SPECS = [
+  Spec('hand', REASONING, 'consistencyTest_3_31_25', ('syntax', 'function'),
+       'Syntax and Functionality Consistency by Model', 'legend_3_31_25', 'Grouped_3_31_25'),
+  Spec('hand', FIRST, 'testGraph', ('syntax', 'function', 'semantics'),
+       'Semantic, Syntax, and Function Reliability by Model', 'legend', 'Grouped'),
+  # the same reasoning models graded by score.py instead of by hand
+  Spec('score.py', REASONING, 'consistencyAuto', ('syntax', 'structure'),
+       'Syntax and Structure Consistency by Model (automatic)'),
+]
+
+BAR = 0.2  # height of each bar
+PDF = {'CreationDate': None}
+
+# chart and legend figures of this process, made on first use
+TEMPLATE = {}
+
+
+def template():
+  if not TEMPLATE:
+    TEMPLATE['chart'] = plt.figure(figsize=(12, 7))
+    TEMPLATE['legend'] = plt.figure(figsize=(6, 2))
+  return TEMPLATE['chart'], TEMPLATE['legend']
+
+
+def counts(grades, models):
+  # (model, category) counts of a (model, persona, task) grade array
+  result = tally.counts(grades, models)
+  return np.array([result[m] for m in models])
+
+
+def draw(ax, spec, data):
+  # data: kind -> (model, category) counts
+  ax.invert_yaxis()
+  ax.set_xlim(0, max(d.sum(axis=1).max() for d in data.values()))
+  positions = np.arange(len(spec.models))
+  for offset, kind in enumerate(spec.kinds):
+    label, colors = KINDS[kind]
+    d = data[kind]
+    starts = d.cumsum(axis=1) - d
+    for i, (category, color) in enumerate(zip(CATEGORIES, colors)):
+      rects = ax.barh(positions + offset * BAR, d[:, i], left=starts[:, i], height=BAR,
+                      label=f"{category} ({label})", color=color)
+      ax.bar_label(rects, label_type='center', color='black', fontsize=16)
+
+  # labels sit at the second bar of each model, as in the original charts
+  ax.set_yticks(positions + BAR)
+  ax.set_yticklabels(spec.models, fontsize=16)
+  ax.tick_params(axis='x', labelsize=16)
+  ax.set_xlabel('Count', fontsize=18)
+  ax.set_ylabel('Model', fontsize=18)
+  ax.set_title(spec.title, fontsize=22)
+
+
+def render(spec, out=HERE):
+  # write the chart, legend and grouped PDFs of one spec; the paths written
+  conn = warehouse.build(sources=[spec.dataset])
+  data = {kind: counts(warehouse.grades(conn, kind, spec.models, source=spec.dataset), spec.models)
+          for kind in spec.kinds}
+  if not any(d.any() for d in data.values()):
+    return []
+
+  chart, legend = template()
+  chart.clear()
+  chart.set_layout_engine(None)
+  ax = chart.add_subplot(111)
+  draw(ax, spec, data)
+  paths = [os.path.join(out, f"{name}.pdf") for name in
+           (spec.name, spec.legend or f"legend_{spec.name}", spec.grouped or f"Grouped_{spec.name}")]
+  chart.savefig(paths[0], metadata=PDF)
+
+  legend.clear()
+  ax_legend = legend.add_subplot(111)
+  ax_legend.axis('off')
+  ax_legend.legend(*ax.get_legend_handles_labels(), loc='center', ncol=len(spec.kinds))
+  legend.savefig(paths[1], bbox_inches='tight', metadata=PDF)
+
+  chart.tight_layout()
+  chart.savefig(paths[2], metadata=PDF)
+  return paths
+
+
+def main(names=None, workers=None):
+  start = time.perf_counter()
+  names = names or sys.argv[1:]
+  specs = [s for s in SPECS if not names or s.name in names]
+  unknown = set(names) - {s.name for s in specs}
+  if unknown: raise SystemExit(f"unknown figures: {', '.join(sorted(unknown))}")
+
+  # the warehouse is brought up to date once, before the workers read from it
+  warehouse.build(sources=sorted({s.dataset for s in specs}))
+  with ProcessPoolExecutor(max_workers=workers) as pool:
+    for spec, paths in zip(specs, pool.map(render, specs)):
+      print(f"{spec.name}: {', '.join(os.path.basename(p) for p in paths) or f'no {spec.dataset} grades'}")
+  print(f"{len(specs)} figures in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+  main()
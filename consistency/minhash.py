@@ -0,0 +1,206 @@
+import ast
+import os
+import re
+import sys
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import score
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Complexity'))
+import corpus
+
+# Near-duplicate code across the whole corpus. Every file, and every top-level
+# function and class in it ("path:get_db"), becomes a set of token shingles
+# (normalized code with canonical names, so renamed variables still match),
+# summarized by a MinHash signature; signatures are split into LSH bands so
+# only units sharing a band bucket are ever compared.
+#
+# Signatures are cached by the SHA-256 stored in the corpus manifest, so when
+# new model folders land only their files are tokenized again. The cache is
+# dropped when SHINGLE, BANDS, ROWS or SEED change; bump VERSION when units()
+# or score.normalize() change what gets tokenized.
+#
+#   python minhash.py                 clusters of near-duplicate code
+#   python minhash.py <file> [...]    code that looks like the given files
+
+CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'minhash.npz')
+VERSION = 1
+
+SHINGLE = 5          # tokens per shingle
+BANDS, ROWS = 16, 8  # 128 hash functions; pairs above ~0.7 Jaccard share a band
+THRESHOLD = 0.8      # estimated Jaccard similarity reported as near-duplicate
+SEED = 20240611      # of the hash functions
+
+# (a * x + b) mod PRIME with a, b, x below 2**32 never overflows uint64
+PRIME = 4294967291
+rng = np.random.default_rng(SEED)
+A = rng.integers(1, PRIME, BANDS * ROWS, dtype=np.uint64)
+B = rng.integers(0, PRIME, BANDS * ROWS, dtype=np.uint64)
+DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+EMPTY = np.full(BANDS * ROWS, np.iinfo(np.uint64).max, dtype=np.uint64)
+STAMP = f"{VERSION}:{SHINGLE}:{BANDS}x{ROWS}:{SEED}"  # signatures of other stamps are not reused
+
+
+def units(source):
+  # (name, tokens) for the whole file ('') and each top-level function and class
+  try:
+    names = {n.lineno: n.name for n in ast.parse(source).body if isinstance(n, DEFINITIONS)}
+    tree = score.normalize(source, rename=True)
+  except (SyntaxError, ValueError):
+    # unparsable outputs still get compared as a whole on their raw tokens
+    return [('', re.findall(r"\w+|\S", re.sub(r"#.*", "", source)))]
+  out = [('', score.tokens(tree))]
+  for node in tree.body:
+    if isinstance(node, DEFINITIONS):
+      out.append((names[node.lineno], score.tokens(node)))
+  return out
+
+
+def shingles(toks):
+  grams = {" ".join(toks[i:i + SHINGLE]) for i in range(max(len(toks) - SHINGLE + 1, 1))}
+  return np.array([zlib.crc32(g.encode()) for g in grams], dtype=np.uint64)
+
+
+def signature(x):
+  # one universal hash per row of A/B, minimum over all shingles
+  if not len(x): return EMPTY
+  return ((A[:, None] * (x[None, :] % PRIME) % PRIME + B[:, None]) % PRIME).min(axis=1)
+
+
+def sign(path):
+  # [(unit name, signature)], nothing for empty files (package markers, missing outputs)
+  with open(os.path.join(corpus.ROOT, path), encoding='utf-8', errors='replace') as f:
+    source = f.read()
+  if not source.strip(): return []
+  return [(name, signature(shingles(toks))) for name, toks in units(source)]
+
+
+def similarity(a, b):
+  # estimated Jaccard similarity of the shingle sets
+  return float(np.mean(a == b))
+
+
+def load_cache(path=CACHE):
+  # file hash -> [(unit name, signature)], {} when the cache is missing,
+  # unreadable or was written with other parameters
+  try:
+    data = np.load(path)
+  except (OSError, ValueError):
+    return {}
+  with data:
+    if 'stamp' not in data.files or str(data['stamp']) != STAMP: return {}
+    cache = {key: [] for key in data['empty'].tolist()}
+    for key, name, sig in zip(data['keys'].tolist(), data['names'].tolist(), data['signatures']):
+      cache.setdefault(key, []).append((name, sig))
+  return cache
+
+
+def save_cache(cache, path=CACHE):
+  # one row per unit; files without any are listed so they are not signed again
+  rows = [(key, name, sig) for key in sorted(cache) for name, sig in cache[key]]
+  np.savez(path, stamp=np.array(STAMP), keys=np.array([r[0] for r in rows], dtype=str), names=np.array([r[1] for r in rows], dtype=str),
+           signatures=np.array([r[2] for r in rows], dtype=np.uint64).reshape(len(rows), BANDS * ROWS),
+           empty=np.array([key for key in sorted(cache) if not cache[key]], dtype=str))
+
+
+class Index:
+
+  def __init__(self):
+    self.keys = []
+    self.signatures = []
+    # band number and band values -> positions of the files in that bucket
+    self.buckets = defaultdict(list)
+
+  def bands(self, sig):
+    return [(i, sig[i * ROWS:(i + 1) * ROWS].tobytes()) for i in range(BANDS)]
+
+  def add(self, key, sig):
+    for band in self.bands(sig):
+      self.buckets[band].append(len(self.keys))
+    self.keys.append(key)
+    self.signatures.append(sig)
+
+  def candidates(self, sig):
+    return {i for band in self.bands(sig) for i in self.buckets.get(band, ())}
+
+  def query(self, sig, threshold=THRESHOLD):
+    # (key, similarity) of the indexed files that look like sig, most similar first
+    found = [(self.keys[i], similarity(sig, self.signatures[i])) for i in self.candidates(sig)]
+    return sorted((f for f in found if f[1] >= threshold), key=lambda f: -f[1])
+
+  def clusters(self, threshold=THRESHOLD):
+    # connected components of the near-duplicate pairs, largest first
+    parent = list(range(len(self.keys)))
+
+    def find(i):
+      while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+      return i
+
+    for members in self.buckets.values():
+      for n, i in enumerate(members):
+        for j in members[:n]:
+          if find(i) != find(j) and similarity(self.signatures[i], self.signatures[j]) >= threshold:
+            parent[find(i)] = find(j)
+
+    groups = defaultdict(list)
+    for i, key in enumerate(self.keys):
+      groups[find(i)].append(key)
+    return sorted((g for g in groups.values() if len(g) > 1), key=lambda g: (-len(g), g))
+
+
+def build(conn, workers=None):
+  # index of every manifest file; only hashes missing from the cache are signed
+  rows = corpus.files(conn)
+  cache = load_cache()
+  todo = {}
+  for r in rows:
+    if r['sha256'] not in cache: todo.setdefault(r['sha256'], r['path'])
+  if todo:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+      cache.update(zip(todo, pool.map(sign, todo.values(), chunksize=16)))
+    save_cache({r['sha256']: cache[r['sha256']] for r in rows})
+
+  index = Index()
+  for r in rows:
+    for name, sig in cache[r['sha256']]:
+      index.add(f"{r['path']}:{name}" if name else r['path'], sig)
+  return index, len(todo)
+
+
+def main():
+  start = time.perf_counter()
+  conn = corpus.load()
+  index, signed = build(conn)
+  print(f"{len(index.keys)} units indexed in {time.perf_counter() - start:.2f}s ({signed} files signed)")
+
+  if len(sys.argv) > 1:
+    for path in sys.argv[1:]:
+      path = os.path.relpath(os.path.abspath(path), corpus.ROOT).replace(os.sep, '/')
+      start = time.perf_counter()
+      found = []
+      for name, sig in sign(path):
+        key = f"{path}:{name}" if name else path
+        found.extend((key, k, s) for k, s in index.query(sig) if not k.startswith(path + ':') and k != path)
+      print(f"\n{path}: {len(found)} near-duplicates ({(time.perf_counter() - start) * 1000:.1f} ms)")
+      for key, k, s in found:
+        print(f"  {s:.2f}  {key}  {k}")
+    return
+
+  groups = index.clusters()
+  labels = {r['path']: r['label'] for r in corpus.files(conn)}
+  print(f"{len(groups)} clusters of near-duplicates (estimated Jaccard >= {THRESHOLD})")
+  for group in groups:
+    print(f"\n{len(group)} units, {', '.join(sorted({labels[k.partition(':')[0]] for k in group}))}")
+    for key in group:
+      print(f"  {key}")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,198 @@
+import ast
+import builtins
+import csv
+import io
+import os
+import sys
+import time
+import tokenize
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Complexity'))
+import corpus
+
+# Automatic grading of the testNa.py / testNb.py reliability pairs. Both files
+# are normalized (docstrings and comments dropped, imports sorted, optionally
+# every name defined in the file renamed to v0, v1, ... in order of first use)
+# and compared token by token:
+#   syntax    - normalized code with the original names
+#   structure - normalized code with canonical names, so renamed variables and
+#               helpers still count as the same program
+# Similarities are turned into the 1/2/3 (identical/similar/different) scale
+# used for the hand-graded lists in graph.py and testGraph.py.
+
+# at or above this token similarity a pair is "similar", below it "different".
+# Against the 72 hand-graded syntax cells in grades.csv, 0.25 agrees on 64
+# (89%). Answering "2" everywhere already agrees on 59 (82%), since most
+# pairs are graded similar, so what counts is the 12 graded "3": 0.25 finds 4
+# of them and never calls a hand-graded "2" different. 0.3 finds 6 but turns
+# one "2" into a "3" (90%); 0.2 and 0.35 both fall back to 86%.
+SIMILAR = 0.25
+
+BUILTINS = set(dir(builtins))
+
+
+class Normalizer(ast.NodeTransformer):
+
+  def __init__(self, rename):
+    self.rename = rename
+    self.defined = set()
+    self.names = {}
+
+  def canonical(self, name):
+    if not self.rename or name not in self.defined: return name
+    return self.names.setdefault(name, f"v{len(self.names)}")
+
+  def body(self, nodes):
+    # drop docstrings and sort each run of consecutive imports
+    if nodes and isinstance(nodes[0], ast.Expr) and isinstance(getattr(nodes[0], 'value', None), ast.Constant) \
+        and isinstance(nodes[0].value.value, str):
+      nodes = nodes[1:]
+    out, run = [], []
+    for node in nodes + [None]:
+      if isinstance(node, (ast.Import, ast.ImportFrom)):
+        node.names.sort(key=lambda a: (a.name, a.asname or ''))
+        run.append(node)
+        continue
+      out.extend(sorted(run, key=ast.unparse))
+      run = []
+      if node is not None: out.append(node)
+    return out or [ast.Pass()]
+
+  def generic_visit(self, node):
+    if isinstance(getattr(node, 'body', None), list):
+      node.body = self.body(node.body)
+    return super().generic_visit(node)
+
+  def visit_Name(self, node):
+    node.id = self.canonical(node.id)
+    return node
+
+  def visit_arg(self, node):
+    node.arg = self.canonical(node.arg)
+    node.annotation = None
+    return node
+
+  def visit_FunctionDef(self, node):
+    node.name = self.canonical(node.name)
+    node.returns = None
+    return self.generic_visit(node)
+
+  visit_AsyncFunctionDef = visit_FunctionDef
+
+  def visit_ClassDef(self, node):
+    node.name = self.canonical(node.name)
+    return self.generic_visit(node)
+
+
+def defined_names(tree):
+  # names the file itself binds: variables, arguments, functions and classes
+  names = set()
+  for node in ast.walk(tree):
+    if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+      names.add(node.id)
+    elif isinstance(node, ast.arg):
+      names.add(node.arg)
+    elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+      names.add(node.name)
+  return names - BUILTINS - {'self', 'cls'}
+
+
+def normalize(source, rename=False):
+  tree = ast.parse(source)
+  normalizer = Normalizer(rename)
+  normalizer.defined = defined_names(tree)
+  return normalizer.visit(tree)
+
+
+def tokens(tree):
+  text = ast.unparse(tree)
+  skip = (tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER)
+  return [t.string for t in tokenize.generate_tokens(io.StringIO(text).readline) if t.type not in skip]
+
+
+def similarity(a, b):
+  if a == b: return 1.0
+  return SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def category(sim):
+  if sim is None: return None
+  return 1 if sim == 1.0 else 2 if sim >= SIMILAR else 3
+
+
+def compare(pair):
+  path_a, path_b = pair
+  try:
+    sources = []
+    for path in (path_a, path_b):
+      with open(os.path.join(corpus.ROOT, path), encoding='utf-8') as f:
+        sources.append(f.read())
+    syntax = similarity(*(tokens(normalize(s)) for s in sources))
+    structure = similarity(*(tokens(normalize(s, rename=True)) for s in sources))
+    error = ''
+  except (SyntaxError, ValueError, UnicodeDecodeError) as e:
+    syntax = structure = None
+    error = f"{type(e).__name__}: {e}"
+  return {'syntax_similarity': syntax, 'structure_similarity': structure,
+          'syntax': category(syntax), 'structure': category(structure), 'error': error}
+
+
+def pairs(conn):
+  # (row for side a, row for side b) for every reliability run
+  runs = defaultdict(dict)
+  for r in corpus.files(conn, reliability=1, role='app'):
+    runs[(r['label'], r['persona'], r['task'], r['run'])][r['side']] = r
+  return [(sides['a'], sides['b']) for key, sides in sorted(runs.items()) if 'a' in sides and 'b' in sides]
+
+
+def score_all(conn, workers=None):
+  todo = pairs(conn)
+  with ProcessPoolExecutor(max_workers=workers) as pool:
+    results = pool.map(compare, [(a['path'], b['path']) for a, b in todo], chunksize=4)
+    scores = []
+    for (a, b), result in zip(todo, results):
+      scores.append(dict(label=a['label'], persona=a['persona'], task=a['task'], run=a['run'],
+                         path_a=a['path'], path_b=b['path'], **result))
+  return scores
+
+
+def matrix(scores, metric, models, tasks=range(1, 10)):
+  # one grade per model, persona and task (median over the runs), laid out like
+  # the hand-graded lists: rows model(P1), model(P2) for each model, columns tasks;
+  # P1 is the software persona and P2 the security one, as in complexity.txt
+  grades = defaultdict(list)
+  for s in scores:
+    if s[metric] is not None:
+      grades[(s['label'], s['persona'], s['task'])].append(s[metric])
+  out = np.zeros((2 * len(models), len(tasks)), dtype=int)
+  for i, model in enumerate(models):
+    for j, persona in enumerate(('software', 'security')):
+      for k, task in enumerate(tasks):
+        g = grades.get((model, persona, task))
+        out[2 * i + j, k] = int(np.ceil(np.median(g))) if g else 0
+  return out
+
+
+def main():
+  start = time.perf_counter()
+  scores = score_all(corpus.load())
+
+  out = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scores.csv')
+  with open(out, 'w', newline='') as f:
+    writer = csv.DictWriter(f, fieldnames=list(scores[0]))
+    writer.writeheader()
+    writer.writerows(scores)
+  print(f"{len(scores)} pairs scored in {time.perf_counter() - start:.2f}s -> {out}")
+
+  models = ["GPT-o3-mini-high", "GPT-o3-mini", "Gemini Flash 2.0 Thinking", "Deepseek"]
+  for metric in ('syntax', 'structure'):
+    print(f"{metric:<10}= {matrix(scores, metric, models).flatten().tolist()}")
+
+
+if __name__ == '__main__':
+  main()
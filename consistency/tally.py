@@ -0,0 +1,19 @@
+import numpy as np
+
+CATEGORIES = (1, 2, 3)  # 1 (identical), 2 (similar), 3 (different)
+
+def counts(data, models, categories=CATEGORIES):
+  # data holds the grades of each model along the first axis, in the order of
+  # `models`; any other shape (personas, tasks, runs) is flattened. Every grade
+  # is offset into its model's block of bins so a single bincount counts all
+  # models and categories at once. Grades outside `categories` are ignored.
+  grades = np.asarray(data).reshape(len(models), -1)
+  categories = np.asarray(categories)
+  order = np.argsort(categories)
+  pos = np.searchsorted(categories, grades, sorter=order).clip(0, len(categories) - 1)
+  bins = order[pos]
+  valid = categories[bins] == grades
+
+  flat = (np.arange(len(models))[:, None] * len(categories) + bins)[valid]
+  table = np.bincount(flat, minlength=len(models) * len(categories)).reshape(len(models), len(categories))
+  return dict(zip(models, table.tolist()))
@@ -0,0 +1,173 @@
+import ast
+import csv
+import os
+import sys
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import score
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Complexity'))
+import corpus
+
+# Tree edit distance between normalized ASTs (score.normalize with canonical
+# names), giving a continuous semantic distance for every reliability pair and
+# every cross-model pair of the same task and persona.
+#
+# Every subtree carries a structural hash, so identical subtrees (the Flask
+# boilerplate, get_db, init_db, ...) cost nothing and each pair of distinct
+# subtrees is compared once per worker. Subtrees up to LIMIT node pairs get the
+# exact Zhang-Shasha distance; above it the distance is the relabel cost of the
+# roots plus an alignment of their children (insert/delete cost = subtree size,
+# substitution = recursive distance). That keeps whole files tractable and is
+# an upper bound of the unrestricted edit distance.
+
+LIMIT = 2500
+
+Node = namedtuple('Node', 'label children hash size')
+
+# primitive fields that tell otherwise identical nodes apart
+FIELDS = ('id', 'arg', 'attr', 'name', 'module', 'value', 'n', 's')
+
+
+def label(node):
+  values = [repr(getattr(node, f)) for f in FIELDS
+            if hasattr(node, f) and not isinstance(getattr(node, f), (ast.AST, list))]
+  return type(node).__name__ + (':' + ','.join(values) if values else '')
+
+
+def tree(node):
+  children = tuple(tree(c) for c in ast.iter_child_nodes(node) if not isinstance(c, ast.expr_context))
+  name = label(node)
+  return Node(name, children, hash((name, tuple(c.hash for c in children))),
+              1 + sum(c.size for c in children))
+
+
+def load(path):
+  with open(os.path.join(corpus.ROOT, path), encoding='utf-8') as f:
+    return tree(score.normalize(f.read(), rename=True))
+
+
+def postorder(root):
+  # labels, leftmost leaf descendants and keyroots in postorder
+  labels, lml = [], []
+
+  def walk(n):
+    first = None
+    for c in n.children:
+      i = walk(c)
+      if first is None: first = lml[i]
+    labels.append(n.label)
+    lml.append(len(labels) - 1 if first is None else first)
+    return len(labels) - 1
+
+  walk(root)
+  keyroots = sorted({l: i for i, l in enumerate(lml)}.values())
+  return labels, lml, keyroots
+
+
+def zhang_shasha(a, b):
+  la, lmla, kra = postorder(a)
+  lb, lmlb, krb = postorder(b)
+  td = [[0] * len(lb) for _ in la]
+  for i in kra:
+    for j in krb:
+      li, lj = lmla[i], lmlb[j]
+      m, n = i - li + 2, j - lj + 2
+      fd = [list(range(n))]
+      for x in range(1, m):
+        ix = li + x - 1
+        up, row, label, whole, td_row = fd[x - 1], [x], la[ix], lmla[ix] == li, td[ix]
+        for y in range(1, n):
+          jy = lj + y - 1
+          d = up[y] + 1
+          if row[y - 1] + 1 < d: d = row[y - 1] + 1
+          if whole and lmlb[jy] == lj:
+            c = up[y - 1] + (label != lb[jy])
+            if c < d: d = c
+            td_row[jy] = d
+          else:
+            c = fd[lmla[ix] - li][lmlb[jy] - lj] + td_row[jy]
+            if c < d: d = c
+          row.append(d)
+        fd.append(row)
+  return td[-1][-1]
+
+
+# distances between distinct subtrees, keyed by their hashes; lives for the
+# whole worker so boilerplate shared across files is only compared once
+MEMO = {}
+
+
+def distance(a, b):
+  if a.hash == b.hash: return 0
+  key = (a.hash, b.hash)
+  if key not in MEMO:
+    if a.size * b.size <= LIMIT:
+      MEMO[key] = zhang_shasha(a, b)
+    else:
+      MEMO[key] = (a.label != b.label) + align(a.children, b.children)
+  return MEMO[key]
+
+
+def align(xs, ys):
+  prev = [0]
+  for y in ys: prev.append(prev[-1] + y.size)
+  for x in xs:
+    cur = [prev[0] + x.size]
+    for k, y in enumerate(ys):
+      best = min(prev[k + 1] + x.size, cur[k] + y.size)
+      # a substitution costs at least the size difference, skip it when that
+      # alone cannot beat deleting or inserting
+      if prev[k] + abs(x.size - y.size) < best:
+        best = min(best, prev[k] + distance(x, y))
+      cur.append(best)
+    prev = cur
+  return prev[-1]
+
+
+def compare(pair):
+  path_a, path_b = pair
+  try:
+    a, b = load(path_a), load(path_b)
+  except (SyntaxError, ValueError, UnicodeDecodeError) as e:
+    return {'distance': None, 'semantic_distance': None, 'error': f"{type(e).__name__}: {e}"}
+  d = distance(a, b)
+  return {'distance': d, 'semantic_distance': d / (a.size + b.size), 'error': ''}
+
+
+def pairs(conn):
+  # reliability a/b pairs, then every two models on the same task and persona
+  out = [('reliability', a, b) for a, b in score.pairs(conn)]
+  outputs = defaultdict(list)
+  for r in corpus.files(conn, reliability=0, role='app', run=1):
+    outputs[(r['task'], r['persona'])].append(r)
+  for key in sorted(outputs):
+    firsts = {}
+    for r in outputs[key]: firsts.setdefault(r['label'], r)
+    out.extend(('cross-model', a, b) for a, b in combinations(firsts.values(), 2))
+  # pairs of the same task sit next to each other so workers reuse the memo
+  return sorted(out, key=lambda p: (p[1]['task'], p[0]))
+
+
+def main():
+  start = time.perf_counter()
+  todo = pairs(corpus.load())
+  with ProcessPoolExecutor() as pool:
+    results = list(pool.map(compare, [(a['path'], b['path']) for _, a, b in todo], chunksize=8))
+
+  out = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'semantics.csv')
+  with open(out, 'w', newline='') as f:
+    writer = csv.writer(f)
+    writer.writerow(['kind', 'task', 'persona', 'label_a', 'run_a', 'path_a', 'label_b', 'run_b', 'path_b',
+                     'distance', 'semantic_distance', 'error'])
+    for (kind, a, b), r in zip(todo, results):
+      writer.writerow([kind, a['task'], a['persona'], a['label'], a['run'], a['path'], b['label'], b['run'],
+                       b['path'], r['distance'], r['semantic_distance'], r['error']])
+  print(f"{len(todo)} pairs in {time.perf_counter() - start:.2f}s -> {out}")
+
+
+if __name__ == '__main__':
+  main()